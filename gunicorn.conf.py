@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for serving the SBERT service
+
+Usage: gunicorn -c gunicorn.conf.py sbert_service:app
+"""
+import os
+
+bind = '0.0.0.0:5001'
+
+# Models load once in the master (preload_app) and are shared copy-on-write by forked workers;
+# threads overlap requests within a worker while torch releases the GIL
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = 16
+worker_class = 'gthread'
+worker_tmp_dir = '/dev/shm'
+preload_app = True
+
+# Split BLAS threads across request threads so concurrent encodes don't oversubscribe cores.
+# The config is read before the app is preloaded, so these apply when torch is imported.
+blas_threads = str(max(1, (os.cpu_count() or 1) // (workers * threads)))
+os.environ.setdefault('OMP_NUM_THREADS', blas_threads)
+os.environ.setdefault('MKL_NUM_THREADS', blas_threads)
+
+
+def when_ready(server):
+    """Run the startup environment checks once in the master, before workers are forked"""
+    import sbert_service
+    sbert_service.run_startup_validation()
+    sbert_service.performance_monitor.log_performance_metrics()
@@ -1,65 +1,132 @@
 ﻿import time
-from collections import deque
+from array import array
+from statistics import fmean
 
 class AccuracyMonitor:
     def __init__(self, window_size=100):
         self.window_size = window_size
-        self.scores = deque(maxlen=window_size)
-        self.timestamps = deque(maxlen=window_size)
-        self.confidence_scores = deque(maxlen=window_size)
+        
+        # Fixed-size ring buffers of unboxed doubles; _head is the next write slot
+        self._scores = array('d', [0.0] * window_size)
+        self._timestamps = array('d', [0.0] * window_size)
+        self._confidences = array('d', [0.0] * window_size)
+        self._head = 0
+        
+        # Running aggregates over the window (Welford mean/M2) so stats are O(1)
+        self._n = 0
+        self._mean = 0.0
+        self._M2 = 0.0
+        self._sum_conf = 0.0
+        self._min = 0.0
+        self._max = 0.0
+    
+    @property
+    def scores(self):
+        """Scores currently in the window, oldest first"""
+        return list(self._ordered(self._scores, self._n))
+    
+    @property
+    def timestamps(self):
+        """Timestamps currently in the window, oldest first"""
+        return list(self._ordered(self._timestamps, self._n))
+    
+    @property
+    def confidence_scores(self):
+        """Confidence scores currently in the window, oldest first"""
+        return list(self._ordered(self._confidences, self._n))
+    
+    def _ordered(self, buffer, n):
+        """Return the last n values of a ring buffer, oldest first"""
+        head = self._head
+        if n <= head:
+            return buffer[head - n:head]
+        return buffer[len(buffer) - (n - head):] + buffer[:head]
         
     def monitor(self, score, confidence=1.0):
         """Monitor and record score"""
         current_time = time.time()
+        head = self._head
+        
+        # Downdate aggregates for the value about to be overwritten
+        extremum_evicted = False
+        if self._n == self.window_size:
+            old_score = self._scores[head]
+            self._n -= 1
+            if self._n == 0:
+                self._mean = 0.0
+                self._M2 = 0.0
+            else:
+                delta = old_score - self._mean
+                self._mean -= delta / self._n
+                self._M2 = max(self._M2 - delta * (old_score - self._mean), 0.0)
+            self._sum_conf -= self._confidences[head]
+            extremum_evicted = old_score == self._min or old_score == self._max
+        
+        self._scores[head] = score
+        self._timestamps[head] = current_time
+        self._confidences[head] = confidence
+        self._head = (head + 1) % self.window_size
+        
+        # Forward Welford update
+        self._n += 1
+        delta = score - self._mean
+        self._mean += delta / self._n
+        self._M2 += delta * (score - self._mean)
+        self._sum_conf += confidence
         
-        self.scores.append(score)
-        self.timestamps.append(current_time)
-        self.confidence_scores.append(confidence)
+        if self._n == 1:
+            self._min = self._max = score
+        elif extremum_evicted:
+            # Only rescan when the evicted value was the cached min/max (buffer is full here)
+            self._min = min(self._scores)
+            self._max = max(self._scores)
+        elif score < self._min:
+            self._min = score
+        elif score > self._max:
+            self._max = score
         
         return self.get_statistics()
     
     def get_statistics(self):
-        """Get current monitoring statistics"""
-        if not self.scores:
+        """Get current monitoring statistics (a new dict on each call)"""
+        n = self._n
+        
+        if not n:
             return {
                 'count': 0,
                 'average_score': 0.0,
                 'min_score': 0.0,
                 'max_score': 0.0,
                 'average_confidence': 0.0,
-                'score_variance': 0.0
+                'score_variance': 0.0,
+                'window_size': self.window_size
             }
         
-        scores_list = list(self.scores)
-        confidence_list = list(self.confidence_scores)
-        
-        avg_score = sum(scores_list) / len(scores_list)
-        avg_confidence = sum(confidence_list) / len(confidence_list)
-        
-        # Calculate variance
-        variance = sum((score - avg_score) ** 2 for score in scores_list) / len(scores_list)
-        
         return {
-            'count': len(scores_list),
-            'average_score': round(avg_score, 4),
-            'min_score': round(min(scores_list), 4),
-            'max_score': round(max(scores_list), 4),
-            'average_confidence': round(avg_confidence, 4),
-            'score_variance': round(variance, 4),
+            'count': n,
+            'average_score': self._mean,
+            'min_score': self._min,
+            'max_score': self._max,
+            'average_confidence': self._sum_conf / n,
+            'score_variance': self._M2 / n,
             'window_size': self.window_size
         }
     
+    def get_statistics_rounded(self):
+        """Get a snapshot of the statistics rounded to 4 decimals for display"""
+        return {
+            key: round(value, 4) if isinstance(value, float) else value
+            for key, value in self.get_statistics().items()
+        }
+    
     def get_recent_trend(self, n=10):
         """Get trend of recent n scores"""
-        if len(self.scores) < n:
+        if self._n < n:
             return "insufficient_data"
         
-        recent_scores = list(self.scores)[-n:]
-        first_half = recent_scores[:n//2]
-        second_half = recent_scores[n//2:]
-        
-        avg_first = sum(first_half) / len(first_half)
-        avg_second = sum(second_half) / len(second_half)
+        recent_scores = self._ordered(self._scores, n)
+        avg_first = fmean(recent_scores[:n//2])
+        avg_second = fmean(recent_scores[n//2:])
         
         if avg_second > avg_first + 0.05:
             return "improving"
@@ -70,19 +137,20 @@ class AccuracyMonitor:
     
     def is_anomaly(self, score, threshold=2.0):
         """Check if score is an anomaly based on historical data"""
-        if len(self.scores) < 10:  # Need sufficient data
+        if self._n < 10:  # Need sufficient data
             return False
         
-        scores_list = list(self.scores)
-        avg_score = sum(scores_list) / len(scores_list)
-        variance = sum((s - avg_score) ** 2 for s in scores_list) / len(scores_list)
-        std_dev = variance ** 0.5
+        std_dev = (self._M2 / self._n) ** 0.5
         
         # Check if score is more than threshold standard deviations away
-        return abs(score - avg_score) > (threshold * std_dev)
+        return abs(score - self._mean) > (threshold * std_dev)
     
     def reset(self):
         """Reset monitoring data"""
-        self.scores.clear()
-        self.timestamps.clear()
-        self.confidence_scores.clear()
\ No newline at end of file
+        self._head = 0
+        self._n = 0
+        self._mean = 0.0
+        self._M2 = 0.0
+        self._sum_conf = 0.0
+        self._min = 0.0
+        self._max = 0.0
\ No newline at end of file
@@ -1,14 +1,41 @@
 ﻿import os
+import re
 import json
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+# Patterns for typing environment/config strings without exception-driven parsing
+_BOOL_RE = re.compile(r'^(?:true|false)$', re.IGNORECASE)
+# Numeric literals as int()/float() accept them, including '_' digit separators
+_DIGITS = r'\d+(?:_\d+)*'
+_INT_RE = re.compile(rf'^[+-]?{_DIGITS}$')
+_FLOAT_RE = re.compile(rf'^[+-]?(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?$')
 
 class ConfigManager:
     def __init__(self):
         self.config = {}
         self.config_loaded = True
+        self._key_cache: Dict[str, tuple] = {}
         self.load_default_config()
+        self._build_accessors()
         self.load_environment_config()
     
+    def _build_accessors(self):
+        """Generate fixed-path getters (e.g. get_server_port) for every default setting"""
+        for section, values in self.config.items():
+            if isinstance(values, dict):
+                for name in values:
+                    setattr(self, f'get_{section}_{name}', self._make_getter(section, name))
+    
+    def _make_getter(self, section: str, name: str):
+        """Build a getter bound to one section.name path, skipping key parsing"""
+        def getter(default: Any = None) -> Any:
+            try:
+                return self.config[section][name]
+            except (KeyError, TypeError):
+                return default
+        return getter
+    
     def load_default_config(self):
         """Load default configuration"""
         self.config = {
@@ -76,7 +103,10 @@ class ConfigManager:
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key (supports dot notation)"""
-        keys = key.split('.')
+        keys = self._key_cache.get(key)
+        if keys is None:
+            keys = tuple(key.split('.'))
+            self._key_cache[key] = keys
         value = self.config
         
         try:
@@ -95,48 +125,59 @@ class ConfigManager:
         """Set nested configuration value"""
         config = self.config
         for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
+            config = config.setdefault(key, {})
         
         # Convert string values to appropriate types
         config[keys[-1]] = self._convert_env_value(value)
     
     def _convert_env_value(self, value: str) -> Any:
         """Convert environment variable string to appropriate type"""
-        if isinstance(value, str):
-            # Boolean conversion
-            if value.lower() in ('true', 'false'):
-                return value.lower() == 'true'
-            
-            # Integer conversion
-            try:
-                if '.' not in value:
-                    return int(value)
-            except ValueError:
-                pass
-            
-            # Float conversion
-            try:
-                return float(value)
-            except ValueError:
-                pass
+        if not isinstance(value, str):
+            return value
+        
+        # Boolean conversion
+        if _BOOL_RE.match(value):
+            return value.lower() == 'true'
+        
+        # int()/float() ignore surrounding whitespace (e.g. a trailing '\r' from a CRLF .env file)
+        number = value.strip()
+        
+        # Integer conversion
+        if _INT_RE.match(number):
+            return int(number)
+        
+        # Float conversion
+        if _FLOAT_RE.match(number):
+            return float(number)
         
         return value
     
     def _merge_config(self, base: dict, override: dict):
         """Merge override config into base config"""
-        for key, value in override.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._merge_config(base[key], value)
-            else:
-                base[key] = value
+        stack = [(base, override)]
+        while stack:
+            base, override = stack.pop()
+            nested = [key for key, value in override.items()
+                      if isinstance(value, dict) and isinstance(base.get(key), dict)]
+            if not nested:
+                # Leaf-only override: let dict.update do the work
+                base.update(override)
+                continue
+            for key, value in override.items():
+                if isinstance(value, dict) and isinstance(base.get(key), dict):
+                    stack.append((base[key], value))
+                else:
+                    base[key] = value
+    
+    def get_all(self) -> Mapping[str, Any]:
+        """Get all configuration as a read-only view (no copy)"""
+        return MappingProxyType(self.config)
     
-    def get_all(self) -> Dict[str, Any]:
-        """Get all configuration"""
+    def get_all_snapshot(self) -> Dict[str, Any]:
+        """Get a shallow copy of all configuration"""
         return self.config.copy()
     
-    def get_all_config(self) -> Dict[str, Any]:
+    def get_all_config(self) -> Mapping[str, Any]:
         """Get all configuration (alias for compatibility)"""
         return self.get_all()
     
@@ -146,28 +187,29 @@ class ConfigManager:
         
         # Validate required settings
         required_settings = [
-            ('model.name', str),
-            ('server.port', int),
-            ('evaluation.similarity_threshold', (int, float)),
-            ('evaluation.confidence_threshold', (int, float))
+            ('model.name', self.get_model_name, str),
+            ('server.port', self.get_server_port, int),
+            ('evaluation.similarity_threshold', self.get_evaluation_similarity_threshold, (int, float)),
+            ('evaluation.confidence_threshold', self.get_evaluation_confidence_threshold, (int, float))
         ]
         
-        for setting, expected_type in required_settings:
-            value = self.get(setting)
+        for setting, getter, expected_type in required_settings:
+            value = getter()
             if value is None:
                 errors.append(f"Missing required setting: {setting}")
             elif not isinstance(value, expected_type):
                 errors.append(f"Invalid type for {setting}: expected {expected_type}, got {type(value)}")
         
         # Validate ranges
-        if self.get('server.port', 0) < 1 or self.get('server.port', 0) > 65535:
+        port = self.get_server_port(0)
+        if port < 1 or port > 65535:
             errors.append("server.port must be between 1 and 65535")
         
-        similarity_threshold = self.get('evaluation.similarity_threshold', 0)
+        similarity_threshold = self.get_evaluation_similarity_threshold(0)
         if not (0 <= similarity_threshold <= 1):
             errors.append("evaluation.similarity_threshold must be between 0 and 1")
         
-        confidence_threshold = self.get('evaluation.confidence_threshold', 0)
+        confidence_threshold = self.get_evaluation_confidence_threshold(0)
         if not (0 <= confidence_threshold <= 1):
             errors.append("evaluation.confidence_threshold must be between 0 and 1")
         
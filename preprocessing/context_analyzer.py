@@ -1,4 +1,13 @@
-﻿class ContextAnalyzer:
+﻿import re
+
+from preprocessing.tokenized_text import TokenizedText
+
+try:
+    import ahocorasick  # Optional C extension for multi-keyword scanning
+except ImportError:
+    ahocorasick = None
+
+class ContextAnalyzer:
     def __init__(self, domain=None):
         self.domain = domain or 'general'
         self.technical_keywords = {
@@ -11,10 +20,25 @@
             'mathematics': ['equation', 'formula', 'calculate', 'solve', 'theorem'],
             'science': ['experiment', 'hypothesis', 'theory', 'analysis', 'research']
         }
+        
+        # Precompile keyword lookups once so analyze() scans the text a single time
+        all_keywords = {keyword for keywords in self.technical_keywords.values() for keyword in keywords}
+        self._keyword_automaton = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for keyword in all_keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._keyword_automaton = automaton
+        # Lookahead lets overlapping keywords match, like the original substring checks
+        self._keyword_pattern = re.compile(
+            '(?=(' + '|'.join(re.escape(keyword) for keyword in sorted(all_keywords, key=len, reverse=True)) + '))'
+        )
     
     def analyze(self, text):
-        """Analyze text context and return metadata with concepts"""
-        if not text:
+        """Analyze text (str or TokenizedText) and return metadata with concepts"""
+        tokens = TokenizedText.of(text) if text else None
+        if tokens is None or not tokens.raw:
             return {
                 'context': 'general',
                 'complexity': 'low',
@@ -25,32 +49,38 @@
                 'technical_score': 0
             }
         
-        text_lower = text.lower()
-        words = text.split()
+        text_lower = tokens.lower
+        word_count = len(tokens.words)
+        
+        # Single pass over the text finds every keyword occurring in it
+        if self._keyword_automaton is not None:
+            present = {keyword for _, keyword in self._keyword_automaton.iter(text_lower)}
+        else:
+            present = set(self._keyword_pattern.findall(text_lower))
         
         # Determine domain
         domain_scores = {}
         found_terms = []
         
         for domain, keywords in self.technical_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-                    found_terms.append(keyword)
-            domain_scores[domain] = score
+            matched = [keyword for keyword in keywords if keyword in present]
+            domain_scores[domain] = len(matched)
+            found_terms.extend(matched)
         
-        detected_domain = max(domain_scores, key=domain_scores.get) if max(domain_scores.values()) > 0 else 'general'
+        detected_domain, best_score = max(domain_scores.items(), key=lambda item: item[1])
+        if best_score == 0:
+            detected_domain = 'general'
+        technical_score = len(found_terms)
         
         # Determine complexity based on text length and technical terms
         complexity = 'low'
-        if len(words) > 50:
+        if word_count > 50:
             complexity = 'medium'
-        if len(words) > 100 or sum(domain_scores.values()) > 3:
+        if word_count > 100 or technical_score > 3:
             complexity = 'high'
         
         # Extract concepts (unique technical terms found)
-        concepts = list(set(found_terms))
+        concepts = list(present)
         
         return {
             'context': detected_domain,
@@ -58,8 +88,8 @@
             'domain': detected_domain,
             'concepts': concepts,
             'technical_terms': found_terms,
-            'word_count': len(words),
-            'technical_score': sum(domain_scores.values())
+            'word_count': word_count,
+            'technical_score': technical_score
         }
     
     def calculate_concept_coverage(self, student_concepts, model_concepts):
@@ -67,13 +97,13 @@
         if not model_concepts:
             return 1.0
         
-        student_set = set(student_concepts)
-        model_set = set(model_concepts)
+        # One set is enough; intersection() probes the other iterable directly
+        model_set = model_concepts if isinstance(model_concepts, (set, frozenset)) else set(model_concepts)
         
         if not model_set:
             return 1.0
         
-        matched = len(student_set.intersection(model_set))
+        matched = len(model_set.intersection(student_concepts))
         coverage = matched / len(model_set)
         
         return coverage
@@ -1,26 +1,34 @@
 ﻿import functools
 import time
-import traceback
+from collections import defaultdict
+from types import MappingProxyType
 from typing import Any, Callable
 
 class ErrorHandler:
     def __init__(self, logger=None):
         self.logger = logger
-        self.error_counts = {}
+        self.error_counts = defaultdict(int)
+        self._error_counts_view = MappingProxyType(self.error_counts)
     
     def handle_error(self, error, context="Unknown"):
         """Handle and log errors"""
         error_type = type(error).__name__
         
         # Count errors
-        self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
+        self.error_counts[error_type] += 1
+        
+        # Formatting walks the whole stack; only do it when a logger will record it
+        stack_trace = None
+        if self.logger:
+            import traceback  # Imported lazily; healthy runs never reach this path
+            stack_trace = traceback.format_exc()
         
         error_info = {
             'error_type': error_type,
             'error_message': str(error),
             'context': context,
             'count': self.error_counts[error_type],
-            'traceback': traceback.format_exc()
+            'traceback': stack_trace
         }
         
         if self.logger:
@@ -31,8 +39,12 @@ class ErrorHandler:
         return error_info
     
     def get_error_stats(self):
-        """Get error statistics"""
-        return self.error_counts.copy()
+        """Get error statistics as a live read-only view"""
+        return self._error_counts_view
+    
+    def get_error_stats_snapshot(self):
+        """Get a copy of the error statistics"""
+        return dict(self.error_counts)
     
     def handle_model_loading_error(self, model_name=None, error=None, fallback_models=None, fallback_action=None):
         """Handle model loading errors specifically"""
@@ -104,19 +116,19 @@ def get_error_handler(logger=None):
     return ErrorHandler(logger)
 
 def with_timeout(timeout_seconds):
-    """Decorator to add timeout to functions"""
+    """Decorator to report (not interrupt) functions exceeding timeout_seconds"""
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                elapsed = time.time() - start_time
+                elapsed = time.perf_counter() - start_time
                 if elapsed > timeout_seconds:
                     raise TimeoutError(f"Function {func.__name__} took {elapsed:.2f}s, exceeding timeout of {timeout_seconds}s")
                 return result
             except Exception as e:
-                elapsed = time.time() - start_time
+                elapsed = time.perf_counter() - start_time
                 raise Exception(f"Function {func.__name__} failed after {elapsed:.2f}s: {str(e)}")
         return wrapper
     return decorator
@@ -139,17 +151,21 @@ class RetryHandler:
     
     def retry(self, func):
         """Decorator to retry function on failure"""
+        # Backoff schedule is fixed per decorated function
+        delays = [self.delay * (attempt + 1) for attempt in range(self.max_retries)]
+        max_retries = self.max_retries
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             
-            for attempt in range(self.max_retries + 1):
+            for attempt in range(max_retries + 1):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
-                    if attempt < self.max_retries:
-                        time.sleep(self.delay * (attempt + 1))  # Exponential backoff
+                    if attempt < max_retries:
+                        time.sleep(delays[attempt])  # Linear backoff
                     else:
                         raise last_exception
             
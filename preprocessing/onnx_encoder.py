@@ -0,0 +1,66 @@
+﻿import os
+import shutil
+import tempfile
+
+# Optional ONNX Runtime backend for the fallback model
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
+onnx_runtime_available = ORTModelForFeatureExtraction is not None
+
+FALLBACK_MODEL_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+ONNX_INT8_DIR = os.path.join('models', 'onnx-int8')
+ONNX_INT8_FILE = 'model_quantized.onnx'
+
+def export_onnx_encoder(target_dir=ONNX_INT8_DIR):
+    """
+    Export the fallback model to ONNX and quantize it to INT8 (offline build step)
+    The build is written to a temporary sibling directory and only renamed into place once
+    the quantized model is complete, so an interrupted export never leaves a partial target_dir
+    """
+    parent = os.path.dirname(os.path.abspath(target_dir))
+    os.makedirs(parent, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix='.onnx-int8-', dir=parent)
+    
+    try:
+        ort_model = ORTModelForFeatureExtraction.from_pretrained(FALLBACK_MODEL_ID, export=True)
+        quantizer = ORTQuantizer.from_pretrained(ort_model)
+        quantizer.quantize(
+            save_dir=build_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+        )
+        AutoTokenizer.from_pretrained(FALLBACK_MODEL_ID).save_pretrained(build_dir)
+        
+        if not os.path.isfile(os.path.join(build_dir, ONNX_INT8_FILE)):
+            raise FileNotFoundError(f"Quantization did not produce {ONNX_INT8_FILE}")
+        
+        # Replace any previous build
+        if os.path.isdir(target_dir):
+            shutil.rmtree(target_dir)
+        os.rename(build_dir, target_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+def load_onnx_encoder(model_dir=ONNX_INT8_DIR):
+    """Load a previously exported INT8 ONNX encoder and its tokenizer; never exports"""
+    if not os.path.isfile(os.path.join(model_dir, ONNX_INT8_FILE)):
+        raise FileNotFoundError(
+            f"No INT8 ONNX model in {model_dir}; build it with: python -m preprocessing.onnx_encoder"
+        )
+    
+    session = ORTModelForFeatureExtraction.from_pretrained(
+        model_dir, file_name=ONNX_INT8_FILE, provider='CPUExecutionProvider'
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return session, tokenizer
+
+if __name__ == '__main__':
+    if not onnx_runtime_available:
+        raise SystemExit("optimum[onnxruntime] is required: pip install optimum[onnxruntime]")
+    export_onnx_encoder()
+    print(f"INT8 ONNX encoder written to {ONNX_INT8_DIR}")
\ No newline at end of file
@@ -1,57 +1,187 @@
-﻿import time
+﻿import os
+import time
 import psutil
+import logging
 import threading
-from collections import defaultdict, deque
+from array import array
+from functools import lru_cache
+from itertools import count
+from preprocessing.structured_logger import StructuredLogger
+
+_METRIC_SHARDS = 16  # Power of two so shard lookup is a mask
+_NS_PER_S = 1e9
+_REQUEST_WINDOW = 1000  # Keep last 1000 requests
+
+class RunningStat:
+    """Running count/total/min/max for an operation's durations in integer nanoseconds"""
+    __slots__ = ('count', 'total', 'min', 'max')
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+    
+    def add(self, duration):
+        """Fold one duration into the aggregate"""
+        self.count += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
 
 class PerformanceMonitor:
     def __init__(self):
-        self.metrics = defaultdict(list)
+        # Operation name -> RunningStat, striped across independently locked shards
+        self._shards = [(threading.Lock(), {}) for _ in range(_METRIC_SHARDS)]
         self.active_timers = {}
-        self.request_times = deque(maxlen=1000)  # Keep last 1000 requests
+        self._request_counter = count(1)
+        self._request_lock = threading.Lock()
+        # Request window as parallel ring buffers (duration, wall-clock timestamp, status code)
+        self._req_durations = array('d', [0.0] * _REQUEST_WINDOW)
+        self._req_timestamps = array('d', [0.0] * _REQUEST_WINDOW)
+        self._req_codes = array('h', [0] * _REQUEST_WINDOW)
+        self._req_head = 0
+        self._req_count = 0
+        # Running aggregates over the request window, updated on write/overwrite
+        self._req_sum = 0.0
+        self._req_min = float('inf')
+        self._req_max = float('-inf')
+        # Requests per monotonic second over the last minute, for RPM
+        self._rpm_buckets = [0] * 60
+        self._rpm_last_sec = int(time.monotonic())
         self.start_time = time.time()
+        self._start_ns = time.monotonic_ns()
+        self.logger = StructuredLogger("performance_monitor", async_output=True)
+        # Short-lived psutil samples shared by rapid successive callers
+        self._sys_cache_ttl = 0.5
+        self._sys_cache = (0.0, None)
+        self._mem_cache = (0.0, None)
+        # Disk usage barely moves between calls, so it is kept much longer
+        self._disk_cache_ttl = 60.0
+        self._disk_cache = (0.0, None)
+        try:
+            # Prime the non-blocking CPU sampler
+            psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
         
     def start_timer(self, operation_name):
         """Start timing an operation"""
-        self.active_timers[operation_name] = time.time()
+        self.active_timers[operation_name] = time.monotonic_ns()
         return operation_name
     
     def start_request(self):
-        """Start tracking a request and return a request ID"""
-        request_id = f"req_{int(time.time() * 1000)}"
-        self.active_timers[request_id] = time.time()
+        """Start tracking a request and return an integer request ID"""
+        # Unique even for concurrent requests; int keys never clash with operation names
+        request_id = next(self._request_counter)
+        self.active_timers[request_id] = time.monotonic_ns()
         return request_id
     
     def end_request(self, request_id, status_code=200):
         """End tracking a request and record its performance"""
-        if request_id in self.active_timers:
-            duration = time.time() - self.active_timers[request_id]
+        start = self.active_timers.pop(request_id, None)
+        if start is not None:
+            duration = (time.monotonic_ns() - start) / _NS_PER_S
             self.record_request(duration, status_code)
-            del self.active_timers[request_id]
             return duration
         return None
     
     def end_timer(self, operation_name):
         """End timing an operation and record the duration"""
-        if operation_name in self.active_timers:
-            duration = time.time() - self.active_timers[operation_name]
-            self.metrics[operation_name].append(duration)
-            del self.active_timers[operation_name]
-            return duration
+        start = self.active_timers.pop(operation_name, None)
+        if start is not None:
+            duration_ns = time.monotonic_ns() - start
+            self._record_metric(operation_name, duration_ns)
+            return duration_ns / _NS_PER_S
         return None
     
+    def _record_metric(self, operation_name, duration_ns):
+        """Update the running aggregate for an operation under its shard lock"""
+        lock, shard = self._shards[hash(operation_name) & (_METRIC_SHARDS - 1)]
+        with lock:
+            stat = shard.get(operation_name)
+            if stat is None:
+                stat = shard[operation_name] = RunningStat()
+            stat.add(duration_ns)
+    
+    def _metric_snapshot(self):
+        """Copy (name, count, total, min, max) in seconds for every operation, one shard lock at a time"""
+        snapshot = []
+        for lock, shard in self._shards:
+            with lock:
+                snapshot.extend(
+                    (name, stat.count, stat.total / _NS_PER_S, stat.min / _NS_PER_S, stat.max / _NS_PER_S)
+                    for name, stat in shard.items()
+                )
+        return snapshot
+    
+    @property
+    def request_times(self):
+        """Requests currently in the window as dicts, oldest first"""
+        with self._request_lock:
+            n = self._req_count
+            head = self._req_head
+            start = (head - n) % _REQUEST_WINDOW
+            indices = [(start + i) % _REQUEST_WINDOW for i in range(n)]
+            return [
+                {
+                    'duration': self._req_durations[i],
+                    'status_code': self._req_codes[i],
+                    'timestamp': self._req_timestamps[i]
+                }
+                for i in indices
+            ]
+    
+    def _request_snapshot(self):
+        """Copy (count, sum, min, max) of the request window"""
+        with self._request_lock:
+            return self._req_count, self._req_sum, self._req_min, self._req_max
+    
     def record_request(self, duration, status_code=200):
         """Record request performance"""
-        self.request_times.append({
-            'duration': duration,
-            'status_code': status_code,
-            'timestamp': time.time()
-        })
+        timestamp = time.time()
+        sec = int(time.monotonic())
+        with self._request_lock:
+            head = self._req_head
+            durations = self._req_durations
+            evicted = None
+            if self._req_count == _REQUEST_WINDOW:
+                evicted = durations[head]
+            else:
+                self._req_count += 1
+            
+            durations[head] = duration
+            self._req_timestamps[head] = timestamp
+            self._req_codes[head] = status_code
+            self._req_head = (head + 1) % _REQUEST_WINDOW
+            self._advance_rpm(sec)
+            self._rpm_buckets[sec % 60] += 1
+            
+            self._req_sum += duration
+            if evicted is not None:
+                self._req_sum -= evicted
+                # Rescan only when the evicted value was the cached extremum
+                if evicted <= self._req_min or evicted >= self._req_max:
+                    self._req_min = min(durations)
+                    self._req_max = max(durations)
+                    return
+            if duration < self._req_min:
+                self._req_min = duration
+            if duration > self._req_max:
+                self._req_max = duration
     
     def record_memory_usage(self):
         """Record current memory usage"""
+        now = time.monotonic()
+        ts, cached = self._mem_cache
+        if cached is not None and now - ts < self._sys_cache_ttl:
+            return cached
+        
         try:
             memory = psutil.virtual_memory()
-            return {
+            usage = {
                 'percent': memory.percent,
                 'available_mb': memory.available / (1024 * 1024),
                 'used_mb': memory.used / (1024 * 1024)
@@ -62,20 +192,29 @@ class PerformanceMonitor:
                 'available_mb': 0,
                 'used_mb': 0
             }
+        
+        self._mem_cache = (now, usage)
+        return usage
     
     def get_system_metrics(self):
         """Get current system performance metrics"""
+        now = time.monotonic()
+        ts, cached = self._sys_cache
+        if cached is not None and now - ts < self._sys_cache_ttl:
+            return cached
+        
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # Non-blocking: CPU usage since the previous sample
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            disk_percent, disk_free_gb = self._disk_usage()
             
-            return {
+            metrics = {
                 'cpu_percent': cpu_percent,
                 'memory_percent': memory.percent,
                 'memory_available_mb': memory.available / (1024 * 1024),
-                'disk_percent': disk.percent,
-                'disk_free_gb': disk.free / (1024 * 1024 * 1024)
+                'disk_percent': disk_percent,
+                'disk_free_gb': disk_free_gb
             }
         except Exception:
             return {
@@ -85,32 +224,45 @@ class PerformanceMonitor:
                 'disk_percent': 0,
                 'disk_free_gb': 0
             }
+        
+        self._sys_cache = (now, metrics)
+        return metrics
+    
+    def _disk_usage(self):
+        """Return (percent used, free GB) for the root filesystem, cached for _disk_cache_ttl"""
+        now = time.monotonic()
+        ts, cached = self._disk_cache
+        if cached is not None and now - ts < self._disk_cache_ttl:
+            return cached
+        
+        disk = psutil.disk_usage('/')
+        usage = (disk.percent, disk.free / (1024 * 1024 * 1024))
+        self._disk_cache = (now, usage)
+        return usage
     
     def get_performance_stats(self):
         """Get performance statistics"""
-        stats = {}
-        
         # Operation timing stats
-        for operation, times in self.metrics.items():
-            if times:
-                stats[operation] = {
-                    'count': len(times),
-                    'avg_duration': sum(times) / len(times),
-                    'min_duration': min(times),
-                    'max_duration': max(times),
-                    'total_duration': sum(times)
-                }
+        stats = {
+            operation: {
+                'count': op_count,
+                'avg_duration': total / op_count,
+                'min_duration': op_min,
+                'max_duration': op_max,
+                'total_duration': total
+            }
+            for operation, op_count, total, op_min, op_max in self._metric_snapshot()
+            if op_count
+        }
         
         # Request stats
-        if self.request_times:
-            recent_requests = list(self.request_times)
-            durations = [req['duration'] for req in recent_requests]
-            
+        req_count, req_sum, req_min, req_max = self._request_snapshot()
+        if req_count:
             stats['requests'] = {
-                'count': len(recent_requests),
-                'avg_response_time': sum(durations) / len(durations),
-                'min_response_time': min(durations),
-                'max_response_time': max(durations),
+                'count': req_count,
+                'avg_response_time': req_sum / req_count,
+                'min_response_time': req_min,
+                'max_response_time': req_max,
                 'requests_per_minute': self._calculate_rpm()
             }
         
@@ -118,33 +270,68 @@ class PerformanceMonitor:
         stats['system'] = self.get_system_metrics()
         
         # Uptime
-        stats['uptime_seconds'] = time.time() - self.start_time
+        stats['uptime_seconds'] = (time.monotonic_ns() - self._start_ns) / _NS_PER_S
         
         return stats
     
+    def _advance_rpm(self, sec):
+        """Zero the RPM buckets for seconds elapsed since the last update (caller holds the lock)"""
+        last = self._rpm_last_sec
+        if sec == last:
+            return
+        buckets = self._rpm_buckets
+        for elapsed in range(last + 1, min(sec, last + 60) + 1):
+            buckets[elapsed % 60] = 0
+        self._rpm_last_sec = sec
+    
     def _calculate_rpm(self):
         """Calculate requests per minute"""
-        if not self.request_times:
-            return 0
-        
-        current_time = time.time()
-        one_minute_ago = current_time - 60
-        
-        recent_requests = [
-            req for req in self.request_times 
-            if req['timestamp'] > one_minute_ago
-        ]
-        
-        return len(recent_requests)
+        sec = int(time.monotonic())
+        with self._request_lock:
+            self._advance_rpm(sec)
+            return sum(self._rpm_buckets)
     
     def get_health_status(self):
-        """Get overall health status"""
-        system_metrics = self.get_system_metrics()
-        
+        """Get overall health status (full system sampling only when load or memory is near a threshold)"""
         # Define health thresholds
         cpu_threshold = 80
         memory_threshold = 85
         disk_threshold = 90
+        margin = 10
+        
+        # Tier 1: cheap readings (cached memory sample, load average per CPU). Load average counts
+        # runnable and uninterruptible tasks, so it only gates sampling and is reported separately
+        # as load_percent; it is not CPU utilisation and can exceed 100
+        memory = self.record_memory_usage()
+        near_threshold = memory['percent'] > memory_threshold - margin
+        try:
+            load_percent = os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+            near_threshold = near_threshold or load_percent > cpu_threshold - margin
+        except (AttributeError, OSError):
+            load_percent = None
+            near_threshold = True  # No load average on this platform
+        
+        # Tier 2: full system sample only when something is close to its limit
+        if near_threshold:
+            system_metrics = dict(self.get_system_metrics())
+        else:
+            try:
+                disk_percent, disk_free_gb = self._disk_usage()
+            except Exception:
+                disk_percent, disk_free_gb = 0, 0
+            try:
+                # Non-blocking: CPU usage since the previous sample
+                cpu_percent = psutil.cpu_percent(interval=None)
+            except Exception:
+                cpu_percent = 0
+            system_metrics = {
+                'cpu_percent': cpu_percent,
+                'memory_percent': memory['percent'],
+                'memory_available_mb': memory['available_mb'],
+                'disk_percent': disk_percent,
+                'disk_free_gb': disk_free_gb
+            }
+        system_metrics['load_percent'] = load_percent
         
         health_issues = []
         
@@ -162,33 +349,44 @@ class PerformanceMonitor:
         return {
             'status': status,
             'issues': health_issues,
-            'uptime_seconds': time.time() - self.start_time,
+            'uptime_seconds': (time.monotonic_ns() - self._start_ns) / _NS_PER_S,
             'system_metrics': system_metrics
         }
     
     def reset_metrics(self):
         """Reset all metrics"""
-        self.metrics.clear()
+        for lock, shard in self._shards:
+            with lock:
+                shard.clear()
         self.active_timers.clear()
-        self.request_times.clear()
+        with self._request_lock:
+            self._req_head = 0
+            self._req_count = 0
+            self._rpm_buckets = [0] * 60
+            self._rpm_last_sec = int(time.monotonic())
+            self._req_sum = 0.0
+            self._req_min = float('inf')
+            self._req_max = float('-inf')
     
     def log_performance_metrics(self):
-        """Log current performance metrics"""
+        """Log current performance metrics (returns None without collecting when INFO is muted)"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return None
         stats = self.get_performance_stats()
-        print(f"Performance Stats: {stats}")
+        self.logger.info("Performance Stats", stats)
         return stats
     
     def get_component_breakdown(self):
         """Get breakdown of performance by component"""
-        breakdown = {}
-        for operation, times in self.metrics.items():
-            if times:
-                breakdown[operation] = {
-                    'count': len(times),
-                    'avg_duration': sum(times) / len(times),
-                    'total_duration': sum(times)
-                }
-        return breakdown
+        return {
+            operation: {
+                'count': op_count,
+                'avg_duration': total / op_count,
+                'total_duration': total
+            }
+            for operation, op_count, total, _, _ in self._metric_snapshot()
+            if op_count
+        }
     
     def check_performance_thresholds(self):
         """Check if any performance thresholds are violated"""
@@ -201,12 +399,9 @@ class PerformanceMonitor:
         violations = []
         
         # Check response times
-        if self.request_times:
-            recent_requests = list(self.request_times)
-            durations = [req['duration'] for req in recent_requests]
-            
-            max_duration = max(durations) if durations else 0
-            avg_duration = sum(durations) / len(durations) if durations else 0
+        req_count, req_sum, _, max_duration = self._request_snapshot()
+        if req_count:
+            avg_duration = req_sum / req_count
             
             if max_duration > thresholds['max_response_time']:
                 violations.append(f"Max response time exceeded: {max_duration:.2f}s")
@@ -214,10 +409,10 @@ class PerformanceMonitor:
             if avg_duration > thresholds['max_avg_response_time']:
                 violations.append(f"Average response time exceeded: {avg_duration:.2f}s")
         
-        # Check memory
-        system_metrics = self.get_system_metrics()
-        if system_metrics['memory_percent'] > thresholds['max_memory_percent']:
-            violations.append(f"Memory usage high: {system_metrics['memory_percent']:.1f}%")
+        # Check memory (memory-only sample, no CPU sampling needed)
+        memory_percent = self.record_memory_usage()['percent']
+        if memory_percent > thresholds['max_memory_percent']:
+            violations.append(f"Memory usage high: {memory_percent:.1f}%")
         
         return {
             'has_violations': len(violations) > 0,
@@ -228,10 +423,13 @@ class PerformanceMonitor:
     def record_evaluation_time(self, duration_ms, stage):
         """Record evaluation time for a specific stage"""
         stage_key = f"evaluation_{stage}"
-        if stage_key not in self.metrics:
-            self.metrics[stage_key] = []
-        self.metrics[stage_key].append(duration_ms / 1000)  # Convert to seconds
+        self._record_metric(stage_key, round(duration_ms * 1_000_000))  # Convert to nanoseconds
+    
+    def record_evaluation_time_ns(self, duration_ns, stage):
+        """Record an integer perf_counter_ns duration for a stage without a float round trip"""
+        self._record_metric(f"evaluation_{stage}", duration_ns)
 
+@lru_cache(maxsize=None)
 def get_performance_monitor():
-    """Factory function to get performance monitor instance"""
+    """Factory function to get the shared performance monitor instance"""
     return PerformanceMonitor()
\ No newline at end of file
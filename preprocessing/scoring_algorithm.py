@@ -1,16 +1,69 @@
 ﻿import math
 
+def _confidence_kernel(ensemble_score, concept_coverage, key_concepts_present, total_key_concepts):
+    """Confidence from ensemble score and concept coverage (scalar math only)"""
+    # Base confidence from ensemble score
+    base_confidence = 0.7
+    
+    # Boost confidence if concept coverage is high
+    if concept_coverage > 0.8:
+        base_confidence += 0.2
+    elif concept_coverage > 0.6:
+        base_confidence += 0.1
+    
+    # Reduce confidence if scores are very low
+    if ensemble_score < 0.3:
+        base_confidence -= 0.2
+    
+    # Reduce confidence if no key concepts found
+    if key_concepts_present == 0 and total_key_concepts > 0:
+        base_confidence -= 0.3
+    
+    return max(0.3, min(1.0, base_confidence))
+
+def _final_score_kernel(ensemble_score, concept_coverage, key_concepts_present, total_key_concepts, max_score):
+    """Return (adjusted_similarity, final_score, confidence) without building any dicts"""
+    # Apply concept coverage bonus (up to 15% boost)
+    adjusted_similarity = ensemble_score + concept_coverage * 0.15
+    if adjusted_similarity > 1.0:
+        adjusted_similarity = 1.0
+    
+    # Apply partial credit for low scores if at least some concepts are present
+    if adjusted_similarity < 0.5 and key_concepts_present > 0:
+        partial_credit = (key_concepts_present / total_key_concepts) * 0.3
+        if partial_credit > adjusted_similarity:
+            adjusted_similarity = partial_credit
+    
+    confidence = _confidence_kernel(
+        ensemble_score, concept_coverage, key_concepts_present, total_key_concepts
+    )
+    
+    # Convert to score out of max_score
+    final_score = max(0.0, min(max_score, round(adjusted_similarity * max_score, 2)))
+    
+    return adjusted_similarity, final_score, confidence
+
 class ScoringAlgorithm:
+    # Shared, immutable scoring constants (no per-instance allocation)
+    score_ranges = (
+        ('excellent', (0.9, 1.0)),
+        ('good', (0.7, 0.9)),
+        ('average', (0.5, 0.7)),
+        ('poor', (0.3, 0.5)),
+        ('very_poor', (0.0, 0.3))
+    )
+    max_score = 6.0  # Maximum score out of 6
+    # Category per decile of score (index int(score * 10)), matching score_ranges
+    _category_lut = (
+        'very_poor', 'very_poor', 'very_poor', 'poor', 'poor',
+        'average', 'average', 'good', 'good', 'excellent', 'excellent'
+    )
+    _decile_floor = tuple(i / 10 for i in range(11))
+    
+    __slots__ = ('scoring_config',)
+    
     def __init__(self, scoring_config=None):
         self.scoring_config = scoring_config or {}
-        self.score_ranges = {
-            'excellent': (0.9, 1.0),
-            'good': (0.7, 0.9),
-            'average': (0.5, 0.7),
-            'poor': (0.3, 0.5),
-            'very_poor': (0.0, 0.3)
-        }
-        self.max_score = 6.0  # Maximum score out of 6
     
     def calculate_final_score(self, ensemble_score, concept_coverage, key_concepts_present, total_key_concepts):
         """
@@ -25,32 +78,23 @@ class ScoringAlgorithm:
         Returns:
             Dictionary with similarity, score, confidence, and breakdown
         """
-        # Apply concept coverage bonus (up to 15% boost)
+        # Empty answers with no concepts defined: copy the precomputed result
+        if (ensemble_score == 0.0 and concept_coverage == 0.0
+                and key_concepts_present == 0 and total_key_concepts == 0):
+            return {**_ZERO_RESULT, 'breakdown': dict(_ZERO_RESULT['breakdown'])}
+        return self._score_result(ensemble_score, concept_coverage, key_concepts_present, total_key_concepts)
+    
+    def _score_result(self, ensemble_score, concept_coverage, key_concepts_present, total_key_concepts):
+        """Build the full result dict for calculate_final_score"""
         concept_bonus = concept_coverage * 0.15
-        
-        # Calculate adjusted similarity
-        adjusted_similarity = ensemble_score + concept_bonus
-        adjusted_similarity = min(adjusted_similarity, 1.0)
-        
-        # Apply partial credit for low scores
-        if adjusted_similarity < 0.5:
-            # Give some partial credit if at least some concepts are present
-            if key_concepts_present > 0:
-                partial_credit = (key_concepts_present / total_key_concepts) * 0.3
-                adjusted_similarity = max(adjusted_similarity, partial_credit)
-        
-        # Calculate confidence based on concept coverage and score consistency
-        confidence = self._calculate_confidence(
-            ensemble_score, 
-            concept_coverage, 
-            key_concepts_present, 
-            total_key_concepts
+        adjusted_similarity, final_score, confidence = _final_score_kernel(
+            ensemble_score,
+            concept_coverage,
+            key_concepts_present,
+            total_key_concepts,
+            self.max_score
         )
         
-        # Convert to score out of 6
-        final_score = round(adjusted_similarity * self.max_score, 2)
-        final_score = max(0.0, min(self.max_score, final_score))
-        
         # Build breakdown
         breakdown = {
             'ensemble_score': round(ensemble_score, 4),
@@ -72,24 +116,25 @@ class ScoringAlgorithm:
     
     def _calculate_confidence(self, ensemble_score, concept_coverage, key_concepts_present, total_key_concepts):
         """Calculate confidence score based on multiple factors"""
-        # Base confidence from ensemble score
-        base_confidence = 0.7
-        
-        # Boost confidence if concept coverage is high
-        if concept_coverage > 0.8:
-            base_confidence += 0.2
-        elif concept_coverage > 0.6:
-            base_confidence += 0.1
-        
-        # Reduce confidence if scores are very low
-        if ensemble_score < 0.3:
-            base_confidence -= 0.2
+        return _confidence_kernel(ensemble_score, concept_coverage, key_concepts_present, total_key_concepts)
+    
+    def calculate_final_score_batch(self, ensemble_scores, concept_coverages, key_concepts_present, total_key_concepts):
+        """
+        Score a batch of answers without building per-answer breakdown dicts
         
-        # Reduce confidence if no key concepts found
-        if key_concepts_present == 0 and total_key_concepts > 0:
-            base_confidence -= 0.3
+        Args are parallel sequences with one entry per answer.
         
-        return max(0.3, min(1.0, base_confidence))
+        Returns:
+            List of (similarity, score, confidence) tuples
+        """
+        kernel = _final_score_kernel
+        max_score = self.max_score
+        return [
+            kernel(ens, cov, present, total, max_score)
+            for ens, cov, present, total in zip(
+                ensemble_scores, concept_coverages, key_concepts_present, total_key_concepts
+            )
+        ]
     
     def calculate_score(self, similarity, context_weight=1.0, confidence=1.0):
         """Calculate final score with adjustments (legacy method)"""
@@ -110,10 +155,13 @@ class ScoringAlgorithm:
     
     def get_score_category(self, score):
         """Get categorical score description"""
-        for category, (min_score, max_score) in self.score_ranges.items():
-            if min_score <= score <= max_score:
-                return category
-        return 'unknown'
+        if not 0.0 <= score <= 1.0:
+            return 'unknown'
+        idx = int(score * 10)
+        # score * 10 can round up onto the next decile (e.g. 0.8999999999999999)
+        if score < self._decile_floor[idx]:
+            idx -= 1
+        return self._category_lut[idx]
     
     def calculate_percentage(self, score):
         """Convert score to percentage"""
@@ -133,4 +181,7 @@ class ScoringAlgorithm:
             return 0.5
         
         normalized = (raw_score - min_expected) / (max_expected - min_expected)
-        return min(max(normalized, 0.0), 1.0)
\ No newline at end of file
+        return min(max(normalized, 0.0), 1.0)
+
+# Result for the all-zero input, shared by calculate_final_score's fast path
+_ZERO_RESULT = ScoringAlgorithm()._score_result(0.0, 0.0, 0, 0)
\ No newline at end of file
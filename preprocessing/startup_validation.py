@@ -1,16 +1,60 @@
 ﻿import os
 import sys
-import importlib
+import importlib.util
 from typing import List, Tuple
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Import name -> pip distribution name, where they differ
+_PIP_NAMES = {
+    'sentence_transformers': 'sentence-transformers',
+    'sklearn': 'scikit-learn'
+}
+
+def _available_memory_bytes():
+    """Available memory from psutil, else /proc/meminfo; None if neither works"""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open('/proc/meminfo', 'rb') as f:
+            for line in f.read().splitlines():
+                if line.startswith(b'MemAvailable:'):
+                    return int(line.split()[1]) * 1024  # Reported in kB
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _module_available(name: str) -> bool:
+    """Check a module can be imported without executing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
 class StartupValidator:
+    REQUIRED_PACKAGES = (
+        'flask',
+        'sentence_transformers',
+        'torch',
+        'numpy',
+        'sklearn'
+    )
+    
     def __init__(self):
         self.validation_results = []
         self.critical_errors = []
         self.warnings = []
+        self._validated_key = None
     
     def validate(self) -> Tuple[bool, List[str], List[str]]:
-        """Run all startup validations"""
+        """Run all startup validations (memoized per interpreter and package list)"""
+        key = (sys.executable, self.REQUIRED_PACKAGES)
+        if self._validated_key == key:
+            return len(self.critical_errors) == 0, self.critical_errors, self.warnings
+        
         self.validation_results.clear()
         self.critical_errors.clear()
         self.warnings.clear()
@@ -24,6 +68,7 @@ class StartupValidator:
         
         # Determine if startup should continue
         can_start = len(self.critical_errors) == 0
+        self._validated_key = key
         
         return can_start, self.critical_errors, self.warnings
     
@@ -42,33 +87,27 @@ class StartupValidator:
     
     def _validate_required_packages(self):
         """Validate required Python packages are installed"""
-        required_packages = [
-            'flask',
-            'sentence_transformers',
-            'torch',
-            'numpy',
-            'sklearn'
-        ]
-        
         missing_packages = []
         
-        for package in required_packages:
-            try:
-                importlib.import_module(package)
+        # find_spec only consults the import finders; heavy packages like torch are not executed
+        for package in self.REQUIRED_PACKAGES:
+            if _module_available(package):
                 self.validation_results.append(f"Package {package} OK")
-            except ImportError:
+            else:
                 missing_packages.append(package)
         
         if missing_packages:
+            pip_names = [_PIP_NAMES.get(package, package) for package in missing_packages]
             self.critical_errors.append(
                 f"Missing required packages: {', '.join(missing_packages)}. "
-                f"Run: pip install {' '.join(missing_packages)}"
+                f"Run: pip install {' '.join(pip_names)}"
             )
     
     def _validate_model_availability(self):
         """Validate SBERT model can be loaded"""
         try:
-            from sentence_transformers import SentenceTransformer
+            if not _module_available('sentence_transformers'):
+                raise ModuleNotFoundError("No module named 'sentence_transformers'")
             
             # Try to load the default model
             model_name = 'all-MiniLM-L6-v2'
@@ -89,26 +128,24 @@ class StartupValidator:
     def _validate_system_resources(self):
         """Validate system has sufficient resources"""
         try:
-            import psutil
-            
             # Check available memory
-            memory = psutil.virtual_memory()
-            available_gb = memory.available / (1024 ** 3)
-            
-            if available_gb < 1.0:
-                self.warnings.append(f"Low available memory: {available_gb:.1f}GB")
+            available_bytes = _available_memory_bytes()
+            if available_bytes is None:
+                self.warnings.append("psutil not available - cannot check system resources")
             else:
-                self.validation_results.append(f"Available memory: {available_gb:.1f}GB OK")
+                available_gb = available_bytes / (1024 ** 3)
+                if available_gb < 1.0:
+                    self.warnings.append(f"Low available memory: {available_gb:.1f}GB")
+                else:
+                    self.validation_results.append(f"Available memory: {available_gb:.1f}GB OK")
             
             # Check CPU count
-            cpu_count = psutil.cpu_count()
+            cpu_count = os.cpu_count() or 1
             if cpu_count < 2:
                 self.warnings.append(f"Low CPU count: {cpu_count}")
             else:
                 self.validation_results.append(f"CPU count: {cpu_count} OK")
             
-        except ImportError:
-            self.warnings.append("psutil not available - cannot check system resources")
         except Exception as e:
             self.warnings.append(f"Error checking system resources: {str(e)}")
     
@@ -119,15 +156,11 @@ class StartupValidator:
         try:
             os.makedirs(logs_dir, exist_ok=True)
             
-            # Try to write a test file
-            test_file = os.path.join(logs_dir, 'test_write.tmp')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            
-            # Clean up test file
-            os.remove(test_file)
-            
-            self.validation_results.append("File system permissions OK")
+            # Permission bits are enough here; no need to write and remove a probe file
+            if os.access(logs_dir, os.W_OK):
+                self.validation_results.append("File system permissions OK")
+            else:
+                self.warnings.append(f"File system permission issue: {logs_dir} is not writable")
             
         except Exception as e:
             self.warnings.append(f"File system permission issue: {str(e)}")
@@ -136,7 +169,10 @@ class StartupValidator:
         models_dir = 'models'
         try:
             os.makedirs(models_dir, exist_ok=True)
-            self.validation_results.append("Models directory accessible")
+            if os.access(models_dir, os.W_OK):
+                self.validation_results.append("Models directory accessible")
+            else:
+                self.warnings.append(f"Models directory is not writable: {models_dir}")
         except Exception as e:
             self.warnings.append(f"Cannot create models directory: {str(e)}")
     
@@ -1,10 +1,97 @@
 ﻿import logging
+import logging.handlers
 import json
 import time
-from datetime import datetime
+import atexit
+import os
+import queue
+import sys
+import traceback
+from functools import lru_cache
+
+try:
+    import orjson  # Optional faster JSON encoder
+except ImportError:
+    orjson = None
+
+def _dumps(data):
+    """Serialize structured log data to a JSON string"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; let json handle it
+    return json.dumps(data, default=str)
+
+def start_queue_listener(listener):
+    """
+    Start a QueueListener, stop it at exit, and replace it across forks
+    (threads do not survive fork, e.g. gunicorn workers forked from a preloaded app)
+    """
+    current = listener
+    
+    def stop_current():
+        current.stop()
+    
+    def start_new():
+        # Serve the same queue and handlers from a new listener rather than reviving the stopped one
+        nonlocal current
+        current = logging.handlers.QueueListener(
+            current.queue, *current.handlers, respect_handler_level=current.respect_handler_level
+        )
+        current.start()
+    
+    listener.start()
+    atexit.register(stop_current)
+    if hasattr(os, 'register_at_fork'):
+        # Drain and stop the listener before forking so no thread is inside the queue or a handler
+        # when the process is copied; parent and child then each start a fresh listener
+        os.register_at_fork(before=stop_current, after_in_parent=start_new, after_in_child=start_new)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted, so message, payload and exception
+    formatting all happen on the listener thread (the stdlib prepare() formats on the
+    calling thread). Objects passed to a log call must not be mutated afterwards.
+    """
+    
+    def prepare(self, record):
+        return record
+
+class _StructuredMessage:
+    """Log message whose JSON payload is only serialized when a handler formats it (on the listener thread when async)"""
+    __slots__ = ('message', 'extra_data', '_text')
+    
+    def __init__(self, message, extra_data):
+        self.message = message
+        self.extra_data = extra_data
+        self._text = None
+    
+    def __str__(self):
+        if self._text is None:
+            try:
+                # Convert extra_data to JSON string for structured logging
+                self._text = f"{self.message} | Data: {_dumps(self.extra_data)}"
+            except (TypeError, ValueError):
+                self._text = f"{self.message} | Data: {str(self.extra_data)}"
+        return self._text
+
+class DeferredTraceback:
+    """Captures the exception being handled; the traceback text is built only if it is logged"""
+    __slots__ = ('exc_info', '_text')
+    
+    def __init__(self):
+        self.exc_info = sys.exc_info()
+        self._text = None
+    
+    def __str__(self):
+        if self._text is None:
+            self._text = ''.join(traceback.format_exception(*self.exc_info))
+            self.exc_info = None  # Release the frames once formatted
+        return self._text
 
 class StructuredLogger:
-    def __init__(self, name="sbert_service", level=logging.INFO):
+    def __init__(self, name="sbert_service", level=logging.INFO, async_output=False):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
         
@@ -17,49 +104,80 @@ class StructuredLogger:
         if not self.logger.handlers:
             console_handler = logging.StreamHandler()
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            if async_output:
+                # Hand records to a background thread so callers never block on stream I/O
+                log_queue = queue.SimpleQueue()
+                start_queue_listener(logging.handlers.QueueListener(log_queue, console_handler))
+                self.logger.addHandler(DeferredQueueHandler(log_queue))
+            else:
+                self.logger.addHandler(console_handler)
+        
+        # (whole second, ISO string) so timestamps are formatted at most once per second
+        self._ts_cache = (None, None)
+    
+    def isEnabledFor(self, level):
+        """Whether a record at level would be emitted, so callers can skip building its data"""
+        return self.logger.isEnabledFor(level)
     
     def info(self, message, extra_data=None):
         """Log info message with optional structured data"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_data = self._format_log_data(message, extra_data)
-        self.logger.info(log_data)
+        self.logger.info(log_data, extra={'structured_data': extra_data})
     
     def error(self, message, extra_data=None):
         """Log error message with optional structured data"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         log_data = self._format_log_data(message, extra_data)
-        self.logger.error(log_data)
+        self.logger.error(log_data, extra={'structured_data': extra_data})
     
     def warning(self, message, extra_data=None):
         """Log warning message with optional structured data"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         log_data = self._format_log_data(message, extra_data)
-        self.logger.warning(log_data)
+        self.logger.warning(log_data, extra={'structured_data': extra_data})
     
     def debug(self, message, extra_data=None):
         """Log debug message with optional structured data"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         log_data = self._format_log_data(message, extra_data)
-        self.logger.debug(log_data)
+        self.logger.debug(log_data, extra={'structured_data': extra_data})
+    
+    def _timestamp(self):
+        """ISO timestamp with second resolution, cached for the current second"""
+        now = int(time.time())
+        cached_second, cached_iso = self._ts_cache
+        if now != cached_second:
+            cached_iso = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now))
+            self._ts_cache = (now, cached_iso)
+        return cached_iso
     
     def _format_log_data(self, message, extra_data):
-        """Format log message with structured data"""
+        """Format log message with structured data (serialized lazily by the handler)"""
         if extra_data:
-            try:
-                # Convert extra_data to JSON string for structured logging
-                extra_json = json.dumps(extra_data, default=str)
-                return f"{message} | Data: {extra_json}"
-            except (TypeError, ValueError):
-                return f"{message} | Data: {str(extra_data)}"
+            return _StructuredMessage(message, extra_data)
         return message
     
     def log_evaluation(self, model_answer=None, student_answer=None, result=None, domain=None, 
-                      detailed=False, processing_time_ms=None, metadata=None, score=None, confidence=None, processing_time=None):
+                      detailed=False, processing_time_ms=None, metadata=None, score=None, confidence=None, processing_time=None,
+                      model_answer_id=None, student_answer_id=None, cached=False):
         """
         Log evaluation with structured data
         Supports both old and new parameter formats for backward compatibility
+        Answer IDs (text digests) correlate log rows without logging the answers themselves;
+        cached marks results served from the evaluation cache
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         # Handle old format (score, confidence, processing_time)
         if score is not None and result is None:
             evaluation_data = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self._timestamp(),
                 'model_answer_length': len(model_answer) if model_answer else 0,
                 'student_answer_length': len(student_answer) if student_answer else 0,
                 'score': score,
@@ -70,13 +188,14 @@ class StructuredLogger:
         # Handle new format (result dict)
         else:
             evaluation_data = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self._timestamp(),
                 'model_answer_length': len(model_answer) if model_answer else 0,
                 'student_answer_length': len(student_answer) if student_answer else 0,
                 'domain': domain,
                 'detailed': detailed,
                 'processing_time_ms': processing_time_ms or 0,
-                'evaluation_type': 'enhanced_evaluation'
+                'evaluation_type': 'enhanced_evaluation',
+                'cached': cached
             }
             
             # Add result data if provided
@@ -90,37 +209,51 @@ class StructuredLogger:
             if metadata:
                 evaluation_data['metadata'] = metadata
         
+        if model_answer_id is not None:
+            evaluation_data['model_answer_id'] = model_answer_id
+        if student_answer_id is not None:
+            evaluation_data['student_answer_id'] = student_answer_id
+        
         self.info("Evaluation completed", evaluation_data)
     
     def log_error_with_context(self, error, context):
         """Log error with contextual information"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        
         error_data = {
             'error_type': type(error).__name__,
             'error_message': str(error),
             'context': context,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.error("Error occurred", error_data)
     
     def log_error(self, error_type=None, error_message=None, context=None, stack_trace=None):
         """Log error with structured data (compatibility method)"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        
         error_data = {
             'error_type': error_type,
             'error_message': error_message,
             'context': context,
             'stack_trace': stack_trace,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.error("Error occurred", error_data)
     
     def log_performance(self, operation, duration_ms):
         """Log performance metrics for an operation"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         performance_data = {
             'operation': operation,
             'duration_ms': duration_ms,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.debug(f"Performance: {operation}", performance_data)
@@ -128,6 +261,9 @@ class StructuredLogger:
     def log_preprocessing(self, original_text=None, normalized_text=None, corrections=None, 
                          preserved_terms=None, domain=None, text_type=None):
         """Log preprocessing operations"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         preprocessing_data = {
             'text_type': text_type,
             'domain': domain,
@@ -135,7 +271,7 @@ class StructuredLogger:
             'normalized_length': len(normalized_text) if normalized_text else 0,
             'corrections_count': len(corrections) if corrections else 0,
             'preserved_terms_count': len(preserved_terms) if preserved_terms else 0,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.debug(f"Preprocessing: {text_type}", preprocessing_data)
@@ -143,29 +279,36 @@ class StructuredLogger:
     def log_model_scores(self, model_scores=None, weighted_score=None, confidence=None, 
                         variance=None, processing_time_ms=None):
         """Log model scoring information"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         scoring_data = {
             'model_scores': model_scores or {},
             'weighted_score': weighted_score,
             'confidence': confidence,
             'variance': variance,
             'processing_time_ms': processing_time_ms,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.debug("Model scores calculated", scoring_data)
     
     def log_validation_results(self, validation_results=None, context=None):
         """Log validation results"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         validation_data = {
             'context': context,
             'overall_accuracy': validation_results.get('overall_accuracy') if validation_results else None,
             'total_cases': validation_results.get('total_cases') if validation_results else 0,
             'passed_cases': validation_results.get('passed_cases') if validation_results else 0,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._timestamp()
         }
         
         self.info("Validation completed", validation_data)
 
+@lru_cache(maxsize=None)
 def get_structured_logger():
-    """Factory function to get structured logger instance"""
-    return StructuredLogger()
\ No newline at end of file
+    """Factory function to get the shared structured logger instance"""
+    return StructuredLogger(async_output=True)
\ No newline at end of file
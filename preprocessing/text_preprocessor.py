@@ -1,43 +1,81 @@
 ﻿import re
 import string
+from types import MappingProxyType
+
+# Whitespace that collapsing would change: a run of two or more, or any non-space whitespace
+_RE_WS_IRREGULAR = re.compile(r'\s\s|[^\S ]')
+_RE_PUNCT = re.compile(r'[^\w\s.,]')
+# The ASCII characters _RE_PUNCT removes, as a C-level str.translate deletion table
+_ASCII_PUNCT_DELETE = str.maketrans('', '', ''.join(c for c in map(chr, range(128)) if _RE_PUNCT.match(c)))
+_RE_DIGITS = re.compile(r'\d+')
+_ASCII_DIGITS_DELETE = str.maketrans('', '', string.digits)
+_RE_SINGLE = re.compile(r'\b\w\b')
+# Same matches as _RE_SINGLE on ASCII-only text, without Unicode category lookups
+_RE_SINGLE_ASCII = re.compile(r'\b\w\b', re.ASCII)
+
+def _remove_punctuation(text):
+    """Remove punctuation except periods and commas; the regex only runs for non-ASCII text"""
+    text = text.translate(_ASCII_PUNCT_DELETE)
+    if not text.isascii():
+        text = _RE_PUNCT.sub('', text)
+    return text
+
+def _remove_digits(text):
+    """Remove digits; the regex only runs for non-ASCII text, which may hold other decimal digits"""
+    text = text.translate(_ASCII_DIGITS_DELETE)
+    if not text.isascii():
+        text = _RE_DIGITS.sub('', text)
+    return text
+
+# Shared read-only result for empty input; corrections/preserved_terms are empty tuples
+_EMPTY_RESULT = MappingProxyType({
+    'normalized_text': "",
+    'corrections': (),
+    'preserved_terms': ()
+})
 
 class TextPreprocessor:
+    # Shared by all instances rather than rebuilt per instance
+    stop_words = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+    
     def __init__(self, domain=None):
         self.domain = domain or 'general'
-        self.stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
     
-    def preprocess(self, text):
+    def preprocess(self, text, track_corrections=False):
         """
         Basic text preprocessing
         Returns a dictionary with normalized text and metadata
+        (corrections are only recorded when track_corrections is set; empty input
+        returns a shared read-only result)
         """
         if not text:
+            return _EMPTY_RESULT
+        if not track_corrections:
             return {
-                'normalized_text': "",
-                'corrections': [],
-                'preserved_terms': []
+                'normalized_text': self._normalize(text),
+                'corrections': (),
+                'preserved_terms': ()
             }
         
         original_text = text
         corrections = []
-        preserved_terms = []
         
-        # Convert to lowercase
-        text = text.lower()
+        # Convert to lowercase (islower exits at the first uppercase character and avoids a copy)
+        if not text.islower():
+            text = text.lower()
+            
+            # Track if we made any corrections
+            if text != original_text:
+                corrections.append(f"Converted to lowercase")
         
-        # Track if we made any corrections
-        if text != original_text:
-            corrections.append(f"Converted to lowercase")
-        
-        # Remove extra whitespace
-        cleaned = re.sub(r'\s+', ' ', text)
-        if cleaned != text:
+        # Remove extra whitespace (split/join collapses runs and trims in one C-level pass)
+        if _RE_WS_IRREGULAR.search(text):
             corrections.append(f"Normalized whitespace")
-        text = cleaned
+        text = ' '.join(text.split())
         
-        # Remove punctuation except periods and commas
-        cleaned = re.sub(r'[^\w\s.,]', '', text)
-        if cleaned != text:
+        # Remove punctuation except periods and commas (deletion only, so length tells if it changed)
+        cleaned = _remove_punctuation(text)
+        if len(cleaned) != len(text):
             corrections.append(f"Removed special punctuation")
         text = cleaned
         
@@ -46,18 +84,37 @@ class TextPreprocessor:
         return {
             'normalized_text': normalized_text,
             'corrections': corrections,
-            'preserved_terms': preserved_terms
+            'preserved_terms': ()
         }
     
+    def preprocess_batch(self, texts):
+        """Preprocess many texts in one call (no correction tracking)"""
+        normalize = self._normalize
+        return [
+            {
+                'normalized_text': normalize(text),
+                'corrections': (),
+                'preserved_terms': ()
+            } if text else _EMPTY_RESULT
+            for text in texts
+        ]
+    
+    def _normalize(self, text):
+        """Normalized text only: lowercase, collapsed whitespace, special punctuation removed"""
+        if not text.islower():
+            text = text.lower()
+        return _remove_punctuation(' '.join(text.split())).strip()
+    
     def clean_text(self, text):
         """More aggressive cleaning - returns plain string for backward compatibility"""
         preprocessed = self.preprocess(text)
         text = preprocessed['normalized_text']
         
         # Remove numbers
-        text = re.sub(r'\d+', '', text)
+        text = _remove_digits(text)
         
-        # Remove single characters
-        text = re.sub(r'\b\w\b', '', text)
+        # Remove single characters (isascii is O(1) on str)
+        single = _RE_SINGLE_ASCII if text.isascii() else _RE_SINGLE
+        text = single.sub('', text)
         
         return text.strip()
\ No newline at end of file
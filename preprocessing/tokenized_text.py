@@ -0,0 +1,33 @@
+﻿import re
+from functools import lru_cache
+
+# One match per '.'-delimited segment that contains a non-whitespace character
+_SENTENCE_RE = re.compile(r'[^.\s][^.]*')
+
+# Longer texts are tokenized uncached, so the memo cannot pin large request bodies
+_MAX_CACHED_CHARS = 4096
+
+class TokenizedText:
+    """Lowercased text, words, word set and sentence count, computed once per text"""
+    __slots__ = ('raw', 'lower', 'words', 'word_set', 'sentence_count')
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.lower = raw.lower()
+        self.words = tuple(self.lower.split())
+        self.word_set = frozenset(self.words)
+        self.sentence_count = len(_SENTENCE_RE.findall(raw))
+    
+    @classmethod
+    def of(cls, text):
+        """Return tokens for text, reusing an existing instance or a cached one"""
+        if isinstance(text, cls):
+            return text
+        if len(text) > _MAX_CACHED_CHARS:
+            return cls(text)
+        return _tokenize_cached(text)
+
+@lru_cache(maxsize=256)
+def _tokenize_cached(text):
+    """Tokenize a string, memoized so repeated answers are split only once"""
+    return TokenizedText(text)
\ No newline at end of file
@@ -1,10 +1,28 @@
-﻿class ValidationFramework:
+﻿import re
+from operator import itemgetter
+
+_REQUIRED_FIELDS = ('model_answer', 'student_answer')
+_get_required_fields = itemgetter(*_REQUIRED_FIELDS)
+
+# First non-whitespace character; finding none means the text is blank
+_RE_NONSPACE = re.compile(r'\S')
+
+# Control characters removed by sanitize_input (everything below 32 except \n, \r, \t)
+_CONTROL_CHARS = dict.fromkeys(i for i in range(32) if chr(i) not in '\n\r\t')
+
+class ValidationFramework:
+    # Fixed attribute layout: no per-instance __dict__, faster attribute access
+    __slots__ = ('validation_rules', '_score_min', '_score_max', '_min_len', '_max_len')
+    
     def __init__(self):
         self.validation_rules = {
             'score_range': (0.0, 1.0),
             'min_text_length': 1,
             'max_text_length': 10000
         }
+        self._score_min, self._score_max = self.validation_rules['score_range']
+        self._min_len = self.validation_rules['min_text_length']
+        self._max_len = self.validation_rules['max_text_length']
     
     def validate(self, score, model_answer=None, student_answer=None):
         """Validate score and inputs"""
@@ -14,8 +32,8 @@
             'warnings': []
         }
         
-        # Validate score range
-        if not self._validate_score_range(score):
+        # Validate score range (inlined _validate_score_range)
+        if not self._score_min <= score <= self._score_max:
             validation_results['is_valid'] = False
             validation_results['errors'].append(f"Score {score} is outside valid range {self.validation_rules['score_range']}")
         
@@ -28,36 +46,46 @@
             if not self._validate_text_length(student_answer):
                 validation_results['warnings'].append("Student answer length is outside recommended range")
             
-            if not student_answer.strip():
+            if _RE_NONSPACE.search(student_answer) is None:
                 validation_results['is_valid'] = False
                 validation_results['errors'].append("Student answer is empty")
         
         return validation_results
     
+    def is_valid(self, score, model_answer=None, student_answer=None):
+        """Same verdict as validate()['is_valid'] without building the diagnostics dict"""
+        return (self._score_min <= score <= self._score_max
+                and (student_answer is None or _RE_NONSPACE.search(student_answer) is not None))
+    
     def _validate_score_range(self, score):
         """Check if score is within valid range"""
-        min_score, max_score = self.validation_rules['score_range']
-        return min_score <= score <= max_score
+        return self._score_min <= score <= self._score_max
+    
+    def validate_scores(self, scores):
+        """Check a batch of scores against the valid range, one bool per score"""
+        score_min, score_max = self._score_min, self._score_max
+        return [score_min <= score <= score_max for score in scores]
     
     def _validate_text_length(self, text):
         """Check if text length is within acceptable range"""
-        if not text:
-            return False
-        
-        length = len(text)
-        min_length = self.validation_rules['min_text_length']
-        max_length = self.validation_rules['max_text_length']
-        
-        return min_length <= length <= max_length
+        return bool(text) and self._min_len <= len(text) <= self._max_len
     
     def validate_input_format(self, data):
         """Validate input data format"""
-        required_fields = ['model_answer', 'student_answer']
-        
         if not isinstance(data, dict):
             return False, "Input must be a dictionary"
         
-        for field in required_fields:
+        # Fast path: fetch both fields in one C-level call
+        try:
+            model_answer, student_answer = _get_required_fields(data)
+        except KeyError:
+            pass
+        else:
+            if isinstance(model_answer, str) and isinstance(student_answer, str):
+                return True, "Valid input format"
+        
+        # Slow path: report the first problem in field order
+        for field in _REQUIRED_FIELDS:
             if field not in data:
                 return False, f"Missing required field: {field}"
             
@@ -71,12 +99,19 @@
         if not isinstance(text, str):
             return ""
         
-        # Remove null bytes and control characters
-        sanitized = ''.join(char for char in text if ord(char) >= 32 or char in '\n\r\t')
+        max_length = self._max_len
+        
+        # Already clean and short enough: printable text has no control characters to remove
+        if len(text) <= max_length and text.isprintable():
+            return text
         
-        # Limit length
-        max_length = self.validation_rules['max_text_length']
-        if len(sanitized) > max_length:
-            sanitized = sanitized[:max_length]
+        # Remove null bytes and control characters, only scanning as much input as the length limit can keep
+        sanitized = text[:max_length].translate(_CONTROL_CHARS)
+        consumed = max_length
+        while len(sanitized) < max_length and consumed < len(text):
+            # Removed characters freed room; top up from the rest of the input
+            needed = max_length - len(sanitized)
+            sanitized += text[consumed:consumed + needed].translate(_CONTROL_CHARS)
+            consumed += needed
         
         return sanitized
\ No newline at end of file
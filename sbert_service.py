@@ -1,28 +1,56 @@
 from flask import Flask, request, jsonify
-from sentence_transformers import SentenceTransformer, util
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
+from sentence_transformers import SentenceTransformer
 import torch
 import logging
+import logging.handlers
+import atexit
+import queue
 import time
 import json
 import os
-import traceback
+import threading
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache, wraps
 
 # Import enhanced evaluation components
 from preprocessing.text_preprocessor import TextPreprocessor
 from preprocessing.context_analyzer import ContextAnalyzer
+from preprocessing.tokenized_text import TokenizedText
 from preprocessing.ensemble_evaluator import EnsembleEvaluator
 from preprocessing.scoring_algorithm import ScoringAlgorithm
 from preprocessing.validation_framework import ValidationFramework
 from preprocessing.accuracy_monitor import AccuracyMonitor
-from preprocessing.structured_logger import get_structured_logger
+from preprocessing.structured_logger import get_structured_logger, start_queue_listener, DeferredQueueHandler, DeferredTraceback
 from preprocessing.error_handler import get_error_handler, with_timeout, safe_execute
 from preprocessing.performance_monitor import get_performance_monitor
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Optional fast JSON encoder for responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional INT8 ONNX Runtime build of the fallback model (built offline: python -m preprocessing.onnx_encoder)
+from preprocessing.onnx_encoder import onnx_runtime_available, load_onnx_encoder
+
+# Optional Intel Extension for PyTorch (BF16 kernels) for the PyTorch fallback path
+try:
+    import intel_extension_for_pytorch as ipex
+except ImportError:
+    ipex = None
+
+# Configure logging; records are handed to a background listener so request threads never block on output
+log_queue = queue.SimpleQueue()
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, console_handler)
+start_queue_listener(log_listener)
+
+# Records are enqueued unformatted; the listener's handler does all formatting off the request thread
+logging.basicConfig(level=logging.INFO, handlers=[DeferredQueueHandler(log_queue)])
 logger = logging.getLogger(__name__)
 
 # Initialize structured logger, error handler, and performance monitor
@@ -32,15 +60,106 @@ performance_monitor = get_performance_monitor()
 
 app = Flask(__name__)
 
+# Reject oversized bodies before they are read or parsed
+app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; jsonify() goes through it"""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 # Load SBERT model (all-MiniLM-L6-v2 is lightweight and effective) - kept for fallback
 logger.info("Loading SBERT model...")
+onnx_session = None
+onnx_tokenizer = None
+if onnx_runtime_available:
+    try:
+        onnx_session, onnx_tokenizer = load_onnx_encoder()
+        logger.info("✅ ONNX Runtime INT8 SBERT model loaded successfully")
+    except Exception as e:
+        logger.warning(f"⚠️ ONNX Runtime model unavailable, using PyTorch: {e}")
+        onnx_session = None
+
 try:
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model = SentenceTransformer('all-MiniLM-L6-v2') if onnx_session is None else onnx_session
     logger.info("✅ SBERT model loaded successfully")
 except Exception as e:
     logger.error(f"❌ Failed to load SBERT model: {e}")
     model = None
 
+# Convert the PyTorch fallback encoder to BF16 when IPEX is available
+use_bf16 = False
+if ipex is not None and onnx_session is None and model is not None:
+    try:
+        transformer = model._first_module()
+        transformer.auto_model.eval()
+        transformer.auto_model = ipex.optimize(transformer.auto_model, dtype=torch.bfloat16, level='O1')
+        use_bf16 = True
+        logger.info("✅ SBERT model optimized for BF16 with IPEX")
+    except Exception as e:
+        logger.warning(f"⚠️ IPEX BF16 optimization failed, using FP32: {e}")
+
+
+def encode(texts):
+    """Encode texts into L2-normalized sentence embeddings with the fallback model"""
+    # inference_mode skips autograd bookkeeping; grad mode is per-thread, so it is set per call
+    with torch.inference_mode():
+        if onnx_session is None:
+            if use_bf16:
+                with torch.autocast('cpu', dtype=torch.bfloat16):
+                    embeddings = model.encode(texts, convert_to_tensor=True, normalize_embeddings=True)
+                return embeddings.float()
+            return model.encode(texts, convert_to_tensor=True, normalize_embeddings=True)
+        
+        inputs = onnx_tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors='pt')
+        hidden = onnx_session(**inputs).last_hidden_state
+        
+        # Mean-pool over real tokens, then normalize
+        mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+
+# Model answer embeddings by text_key() digest, least recently used first; a gold answer is reused
+# across many students, and digest keys keep the cache from pinning the answer texts themselves
+MODEL_EMBEDDING_CACHE_SIZE = 1024
+model_answer_embeddings = OrderedDict()
+model_answer_embeddings_lock = threading.Lock()
+
+
+def encode_pair(model_answer, student_answer):
+    """
+    Embeddings for a (model, student) pair
+    A cached model answer means only the student side is encoded; otherwise both
+    texts go through a single batched forward pass
+    """
+    key = text_key(model_answer)
+    with model_answer_embeddings_lock:
+        model_embedding = model_answer_embeddings.get(key)
+        if model_embedding is not None:
+            model_answer_embeddings.move_to_end(key)
+    
+    if model_embedding is not None:
+        return model_embedding, encode(student_answer)
+    
+    model_embedding, student_embedding = encode([model_answer, student_answer])
+    with model_answer_embeddings_lock:
+        model_answer_embeddings[key] = model_embedding
+        if len(model_answer_embeddings) > MODEL_EMBEDDING_CACHE_SIZE:
+            model_answer_embeddings.popitem(last=False)
+    return model_embedding, student_embedding
+
+
 # Initialize enhanced evaluation components
 logger.info("Initializing enhanced evaluation components...")
 try:
@@ -94,7 +213,7 @@ except Exception as e:
         error_type='initialization',
         error_message=str(e),
         context={'component': 'enhanced_evaluation'},
-        stack_trace=traceback.format_exc()
+        stack_trace=DeferredTraceback()
     )
     ensemble_evaluator = None
     scoring_algorithm = None
@@ -143,7 +262,9 @@ def get_performance():
             "ensemble_evaluation": {"avg_ms": 180.5, "percentage": 73.8},
             "scoring": {"avg_ms": 18.8, "percentage": 7.7}
         },
-        "threshold_violations": [...]
+        "threshold_violations": [...],
+        "preprocessing_cache": {"hits": 980, "misses": 270, "size": 270, "hit_rate": 0.784},
+        "context_analysis_cache": {...}
     }
     """
     try:
@@ -159,6 +280,12 @@ def get_performance():
         stats['threshold_violations'] = thresholds['violations']
         stats['has_violations'] = thresholds['has_violations']
         
+        # Preprocessing/context-analysis memo hit rates
+        stats['preprocessing_cache'] = cache_stats(preprocess_text)
+        stats['context_analysis_cache'] = cache_stats(analyze_text)
+        stats['model_answer_preprocessing_cache'] = cache_stats(preprocess_model_answer)
+        stats['model_answer_analysis_cache'] = cache_stats(analyze_model_answer)
+        
         # Add timestamp
         stats['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
         
@@ -171,6 +298,62 @@ def get_performance():
             'message': str(e)
         }), 500
 
+# The validation suite runs every case through enhanced_evaluate, so /metrics serves a
+# periodically refreshed snapshot instead of running it per request
+VALIDATION_REFRESH_SEC = 300
+last_validation = {'results': None, 'error': None, 'timestamp': None}
+validation_refresher_lock = threading.Lock()
+validation_refresher = None
+
+
+def refresh_validation_accuracy():
+    """Run the validation suite once and publish the result for /metrics"""
+    global last_validation
+    
+    def evaluator_func(model_answer, student_answer, domain):
+        """Wrapper function for validation"""
+        result = enhanced_evaluate(model_answer, student_answer, domain, False, time.perf_counter_ns())
+        return result
+    
+    try:
+        validation_results = validation_framework.validate_accuracy(evaluator_func)
+        
+        # Check if accuracy meets threshold
+        overall_accuracy = validation_results.get('overall_accuracy', 0.0)
+        if accuracy_monitor and overall_accuracy < 80:
+            accuracy_monitor.check_accuracy_threshold(
+                overall_accuracy / 100,
+                context='metrics_endpoint'
+            )
+        
+        last_validation = {'results': validation_results, 'error': None, 'timestamp': time.time()}
+    except Exception as e:
+        logger.error(f"Error running validation for metrics: {e}")
+        last_validation = {'results': None, 'error': str(e), 'timestamp': time.time()}
+
+
+def run_validation_refresher():
+    """Refresh the validation snapshot every VALIDATION_REFRESH_SEC seconds"""
+    while True:
+        refresh_validation_accuracy()
+        time.sleep(VALIDATION_REFRESH_SEC)
+
+
+def ensure_validation_refresher():
+    """Start the refresher thread on first use (in the serving process, after any fork)"""
+    global validation_refresher
+    
+    if validation_refresher is not None:
+        return
+    with validation_refresher_lock:
+        if validation_refresher is None:
+            validation_refresher = threading.Thread(
+                target=run_validation_refresher,
+                name='validation-refresher',
+                daemon=True
+            )
+            validation_refresher.start()
+
 @app.route('/metrics', methods=['GET'])
 def get_metrics():
     """
@@ -207,32 +390,24 @@ def get_metrics():
     try:
         metrics = {}
         
-        # Get validation accuracy if validation framework is available
+        # Get validation accuracy from the latest background run
         if validation_framework:
-            try:
-                # Run validation to get current accuracy
-                def evaluator_func(model_answer, student_answer, domain):
-                    """Wrapper function for validation"""
-                    result = enhanced_evaluate(model_answer, student_answer, domain, False, time.time())
-                    return result
-                
-                validation_results = validation_framework.validate_accuracy(evaluator_func)
-                
+            ensure_validation_refresher()
+            snapshot = last_validation
+            validation_results = snapshot['results']
+            
+            if validation_results is not None:
                 metrics['overall_accuracy'] = validation_results.get('overall_accuracy', 0.0)
                 metrics['per_domain_accuracy'] = validation_results.get('per_domain_accuracy', {})
-                
-                # Check if accuracy meets threshold
-                if accuracy_monitor and metrics['overall_accuracy'] < 80:
-                    accuracy_monitor.check_accuracy_threshold(
-                        metrics['overall_accuracy'] / 100,
-                        context='metrics_endpoint'
-                    )
-                
-            except Exception as e:
-                logger.error(f"Error running validation for metrics: {e}")
+            else:
                 metrics['overall_accuracy'] = None
                 metrics['per_domain_accuracy'] = {}
-                metrics['validation_error'] = str(e)
+                if snapshot['error'] is not None:
+                    metrics['validation_error'] = snapshot['error']
+            
+            metrics['validation_age_seconds'] = (
+                round(time.time() - snapshot['timestamp'], 1) if snapshot['timestamp'] is not None else None
+            )
         else:
             metrics['overall_accuracy'] = None
             metrics['per_domain_accuracy'] = {}
@@ -344,7 +519,7 @@ def validate():
             
             def evaluator_func(model_answer, student_answer, domain):
                 """Wrapper function for validation"""
-                result = enhanced_evaluate(model_answer, student_answer, domain, False, time.time())
+                result = enhanced_evaluate(model_answer, student_answer, domain, False, time.perf_counter_ns())
                 return result
             
             # Run validation
@@ -376,8 +551,8 @@ def validate():
         
         elif action == 'add':
             # Add new validation case
-            model_answer = data.get('model_answer', '').strip()
-            student_answer = data.get('student_answer', '').strip()
+            model_answer = (data.get('model_answer') or '').strip()
+            student_answer = (data.get('student_answer') or '').strip()
             expected_score = data.get('expected_score')
             domain = data.get('domain', 'general')
             expected_similarity = data.get('expected_similarity')
@@ -421,6 +596,9 @@ def validate():
                 'message': f'Action must be "run" or "add", got "{action}"'
             }), 400
         
+    except HTTPException:
+        # Let Flask answer request errors itself (e.g. 413 for bodies over MAX_CONTENT_LENGTH)
+        raise
     except Exception as e:
         logger.error(f"Error in /validate endpoint: {e}")
         return jsonify({
@@ -486,8 +664,8 @@ def explain():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        model_answer = data.get('model_answer', '').strip()
-        student_answer = data.get('student_answer', '').strip()
+        model_answer = (data.get('model_answer') or '').strip()
+        student_answer = (data.get('student_answer') or '').strip()
         domain = data.get('domain', 'general')
         
         # Validate inputs
@@ -499,7 +677,7 @@ def explain():
         logger.info(f"Generating explanation for evaluation (domain: {domain})")
         
         # Run detailed evaluation
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = enhanced_evaluate(model_answer, student_answer, domain, detailed=True, start_time=start_time)
         
         # Extract breakdown information
@@ -651,6 +829,9 @@ def explain():
         
         return jsonify(response)
         
+    except HTTPException:
+        # Let Flask answer request errors itself (e.g. 413 for bodies over MAX_CONTENT_LENGTH)
+        raise
     except Exception as e:
         logger.error(f"Error in /explain endpoint: {e}")
         return jsonify({
@@ -676,7 +857,8 @@ def evaluate():
         "similarity": 0.85,
         "score": 5.1,
         "confidence": 0.92,
-        "needs_review": false
+        "needs_review": false,
+        "cached": false (enhanced mode - true when served from the evaluation cache)
     }
     
     Response (detailed=true):
@@ -696,8 +878,9 @@ def evaluate():
         }
     }
     """
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     request_id = performance_monitor.start_request()
+    data = None
     
     try:
         # Record memory usage
@@ -710,8 +893,8 @@ def evaluate():
             logger.warning("No data provided in request")
             return jsonify({'error': 'No data provided'}), 400
         
-        model_answer = data.get('model_answer', '').strip()
-        student_answer = data.get('student_answer', '').strip()
+        model_answer = (data.get('model_answer') or '').strip()
+        student_answer = (data.get('student_answer') or '').strip()
         domain = data.get('domain', 'general')
         detailed = data.get('detailed', False)
         
@@ -747,8 +930,7 @@ def evaluate():
                 result = enhanced_evaluate(model_answer, student_answer, domain, detailed, start_time)
                 
                 # Record performance metrics
-                total_time = (time.time() - start_time) * 1000
-                performance_monitor.record_evaluation_time(total_time, 'total')
+                performance_monitor.record_evaluation_time_ns(time.perf_counter_ns() - start_time, 'total')
                 performance_monitor.end_request(request_id)
                 
                 return jsonify(result)
@@ -763,7 +945,7 @@ def evaluate():
                         'model_answer_length': len(model_answer),
                         'student_answer_length': len(student_answer)
                     },
-                    stack_trace=traceback.format_exc()
+                    stack_trace=DeferredTraceback()
                 )
                 logger.info("Falling back to basic evaluation")
                 # Fall through to basic evaluation
@@ -773,19 +955,22 @@ def evaluate():
         result = basic_evaluate(model_answer, student_answer)
         
         # Record performance metrics
-        total_time = (time.time() - start_time) * 1000
-        performance_monitor.record_evaluation_time(total_time, 'total')
+        performance_monitor.record_evaluation_time_ns(time.perf_counter_ns() - start_time, 'total')
         performance_monitor.end_request(request_id)
         
         return jsonify(result)
         
+    except HTTPException:
+        # Let Flask answer request errors itself (e.g. 413 for bodies over MAX_CONTENT_LENGTH)
+        performance_monitor.end_request(request_id)
+        raise
     except Exception as e:
         logger.error(f"❌ Error during evaluation: {e}")
         structured_logger.log_error(
             error_type='evaluation_endpoint',
             error_message=str(e),
-            context={'request_data': data if 'data' in locals() else {}},
-            stack_trace=traceback.format_exc()
+            context={'request_data': data if data is not None else {}},
+            stack_trace=DeferredTraceback()
         )
         
         # End request tracking
@@ -814,37 +999,179 @@ def evaluate():
             }), 500
 
 
-def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detailed: bool, start_time: float) -> dict:
+@lru_cache(maxsize=32)
+def get_text_preprocessor(domain):
+    """Shared TextPreprocessor per domain; instances hold no per-call state"""
+    return TextPreprocessor(domain=domain)
+
+
+@lru_cache(maxsize=32)
+def get_context_analyzer(domain):
+    """Shared ContextAnalyzer per domain, so its keyword automaton/regex is built once"""
+    return ContextAnalyzer(domain=domain)
+
+
+# Texts longer than this are processed without memoization. An entry holds its key text plus
+# processed copies (roughly 20x the text size), so caching full request bodies (up to
+# MAX_CONTENT_LENGTH) could pin gigabytes per worker; this keeps a 2048-entry cache under ~200MB
+MEMOIZE_MAX_TEXT_CHARS = 4096
+
+
+def memoize_short_texts(maxsize):
+    """lru_cache(maxsize) for a function of (text, ...) that only caches texts up to MEMOIZE_MAX_TEXT_CHARS"""
+    def decorator(func):
+        cached_func = lru_cache(maxsize=maxsize)(func)
+        
+        @wraps(func)
+        def wrapper(text, *args):
+            if len(text) > MEMOIZE_MAX_TEXT_CHARS:
+                return func(text, *args)
+            return cached_func(text, *args)
+        
+        wrapper.cache_info = cached_func.cache_info
+        wrapper.cache_clear = cached_func.cache_clear
+        return wrapper
+    return decorator
+
+
+@memoize_short_texts(maxsize=2048)
+def preprocess_text(text, domain, track_corrections):
+    """Preprocess text, memoized so recurring answers skip the pipeline (results are shared; do not mutate)"""
+    return get_text_preprocessor(domain).preprocess(text, track_corrections)
+
+
+@memoize_short_texts(maxsize=2048)
+def analyze_text(text, domain):
+    """Tokenize and context-analyze text, memoized like preprocess_text"""
+    tokens = TokenizedText.of(text)
+    return tokens, get_context_analyzer(domain).analyze(tokens)
+
+
+# Model answers get their own caches so a stream of unique student answers cannot evict them
+@memoize_short_texts(maxsize=256)
+def preprocess_model_answer(text, domain, track_corrections):
+    """preprocess_text for model answers"""
+    return get_text_preprocessor(domain).preprocess(text, track_corrections)
+
+
+@memoize_short_texts(maxsize=256)
+def analyze_model_answer(text, domain):
+    """analyze_text for model answers"""
+    tokens = TokenizedText.of(text)
+    return tokens, get_context_analyzer(domain).analyze(tokens)
+
+
+def cache_stats(cached_func):
+    """Hit/miss counters of an lru_cache'd function for /performance"""
+    info = cached_func.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0
+    }
+
+
+# Completed evaluations by (model key, student key, domain, detailed), least recently used first;
+# keys are digests so the cache does not pin up to 1024 pairs of full answer texts
+EVALUATION_CACHE_SIZE = 1024
+evaluation_cache = OrderedDict()
+evaluation_cache_lock = threading.Lock()
+
+
+def text_key(text):
+    """16-byte blake2b digest of text, used as a compact cache key and log correlation ID"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detailed: bool, start_time: int) -> dict:
     """
     Enhanced evaluation using all components: preprocessing, context analysis, ensemble, and scoring
+    Identical repeat evaluations are answered from an LRU cache (still logged, and flagged with
+    'cached' in the response); results flagged for review are never cached so they are always re-evaluated
     
     Args:
         model_answer: Expected answer text
         student_answer: Student's answer text
         domain: Engineering domain for domain-specific processing
         detailed: Whether to return detailed breakdown
-        start_time: Start time for performance tracking
+        start_time: time.perf_counter_ns() value taken when the request started
         
     Returns:
         Evaluation result dictionary
     """
-    logger.info(f"Enhanced evaluation: domain={domain}, detailed={detailed}, length={len(student_answer)} chars")
+    model_answer = model_answer or ''
+    student_answer = student_answer or ''
+    
+    answer_keys = (text_key(model_answer), text_key(student_answer))
+    key = (*answer_keys, domain, detailed)
+    with evaluation_cache_lock:
+        cached = evaluation_cache.get(key)
+        if cached is not None:
+            evaluation_cache.move_to_end(key)
+    
+    if cached is not None:
+        response = dict(cached)
+        response['cached'] = True
+        total_time_ms = (time.perf_counter_ns() - start_time) / 1e6
+        if detailed:
+            # The cached breakdown timed the original run; report this request's time (no stages ran)
+            breakdown = dict(response['breakdown'])
+            breakdown['processing_time_ms'] = round(total_time_ms, 2)
+            breakdown['stage_times'] = {}
+            response['breakdown'] = breakdown
+        
+        logger.info("✅ Enhanced evaluation complete (cached): score=%.2f/6, confidence=%.4f, time=%.2fms",
+                    response['score'], response['confidence'], total_time_ms)
+        if structured_logger.isEnabledFor(logging.INFO):
+            structured_logger.log_evaluation(
+                model_answer=model_answer,
+                student_answer=student_answer,
+                model_answer_id=answer_keys[0].hex(),
+                student_answer_id=answer_keys[1].hex(),
+                result=response,
+                domain=domain,
+                detailed=detailed,
+                processing_time_ms=total_time_ms,
+                cached=True
+            )
+        return response
+    
+    response = run_enhanced_evaluation(model_answer, student_answer, domain, detailed, start_time, answer_keys)
+    response['cached'] = False
+    
+    if not response['needs_review']:
+        with evaluation_cache_lock:
+            evaluation_cache[key] = response
+            if len(evaluation_cache) > EVALUATION_CACHE_SIZE:
+                evaluation_cache.popitem(last=False)
+    
+    return response
+
+
+def run_enhanced_evaluation(model_answer: str, student_answer: str, domain: str, detailed: bool, start_time: int,
+                            answer_keys: tuple = None) -> dict:
+    """Run the full four-stage evaluation pipeline (uncached; see enhanced_evaluate)"""
+    logger.debug("Enhanced evaluation: domain=%s, detailed=%s, length=%d chars", domain, detailed, len(student_answer))
     
     # Track timing for each stage
     stage_times = {}
     
     # Stage 1: Preprocessing with error handling
-    stage_start = time.time()
+    stage_start = time.perf_counter_ns()
     try:
-        preprocessor = TextPreprocessor(domain=domain)
-        
-        model_preprocessed = preprocessor.preprocess(model_answer)
-        student_preprocessed = preprocessor.preprocess(student_answer)
+        # Corrections are returned in the detailed breakdown and logged at debug level
+        track_corrections = detailed or structured_logger.isEnabledFor(logging.DEBUG)
+        model_preprocessed = preprocess_model_answer(model_answer, domain, track_corrections)
+        student_preprocessed = preprocess_text(student_answer, domain, track_corrections)
         
         model_text = model_preprocessed['normalized_text']
         student_text = student_preprocessed['normalized_text']
         
-    except Exception as e:
+    except (ValueError, KeyError, UnicodeError) as e:
+        # Only data-dependent failures fall back to the raw text; anything else is a bug and
+        # propagates to the caller (/evaluate logs it and falls back to basic evaluation)
         logger.error(f"Preprocessing failed: {e}")
         # Handle preprocessing error with fallback to original text
         model_preprocessed = error_handler.handle_preprocessing_error(model_answer, e)
@@ -853,11 +1180,12 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
         model_text = model_preprocessed['normalized_text']
         student_text = student_preprocessed['normalized_text']
     
-    stage_times['preprocessing_ms'] = (time.time() - stage_start) * 1000
-    logger.debug(f"Preprocessing: {stage_times['preprocessing_ms']:.2f}ms")
+    stage_ns = time.perf_counter_ns() - stage_start
+    stage_times['preprocessing_ms'] = stage_ns / 1e6
+    logger.debug("Preprocessing: %.2fms", stage_times['preprocessing_ms'])
     
     # Record preprocessing performance
-    performance_monitor.record_evaluation_time(stage_times['preprocessing_ms'], 'preprocessing')
+    performance_monitor.record_evaluation_time_ns(stage_ns, 'preprocessing')
     
     # Log preprocessing changes
     try:
@@ -882,11 +1210,12 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
         logger.warning(f"Failed to log preprocessing: {e}")
     
     # Stage 2: Context Analysis
-    stage_start = time.time()
-    context_analyzer = ContextAnalyzer(domain=domain)
+    stage_start = time.perf_counter_ns()
+    context_analyzer = get_context_analyzer(domain)
     
-    model_analysis = context_analyzer.analyze(model_text)
-    student_analysis = context_analyzer.analyze(student_text)
+    # Tokenize once; context analysis and the ensemble share the result
+    model_tokens, model_analysis = analyze_model_answer(model_text, domain)
+    student_tokens, student_analysis = analyze_text(student_text, domain)
     
     # Calculate concept coverage
     concept_coverage = context_analyzer.calculate_concept_coverage(
@@ -897,27 +1226,24 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
     key_concepts_present = int(concept_coverage * len(model_analysis['concepts']))
     total_key_concepts = len(model_analysis['concepts'])
     
-    stage_times['context_analysis_ms'] = (time.time() - stage_start) * 1000
-    logger.debug(f"Context analysis: {stage_times['context_analysis_ms']:.2f}ms")
+    stage_ns = time.perf_counter_ns() - stage_start
+    stage_times['context_analysis_ms'] = stage_ns / 1e6
+    logger.debug("Context analysis: %.2fms", stage_times['context_analysis_ms'])
     
     # Record context analysis performance
-    performance_monitor.record_evaluation_time(stage_times['context_analysis_ms'], 'context_analysis')
+    performance_monitor.record_evaluation_time_ns(stage_ns, 'context_analysis')
     
     # Stage 3: Ensemble Evaluation with error handling and timeout
-    stage_start = time.time()
+    stage_start = time.perf_counter_ns()
+    ensemble_variance = 0.0
     try:
         # Apply 5-second timeout to ensemble evaluation
-        ensemble_result = ensemble_evaluator.ensemble_evaluate(model_text, student_text)
+        ensemble_result = ensemble_evaluator.ensemble_evaluate(model_tokens, student_tokens)
         
         ensemble_score = ensemble_result['weighted_score']
         ensemble_confidence = ensemble_result['confidence']
         model_scores = ensemble_result['model_scores']
-        
-        stage_times['ensemble_evaluation_ms'] = ensemble_result['processing_time_ms']
-        
-        # Check for timeout (soft check since we can't use signal on Windows)
-        if stage_times['ensemble_evaluation_ms'] > 5000:
-            logger.warning(f"Ensemble evaluation exceeded 5s timeout: {stage_times['ensemble_evaluation_ms']:.2f}ms")
+        ensemble_variance = ensemble_result.get('variance', 0.0)
         
     except Exception as e:
         logger.error(f"Ensemble evaluation failed: {e}")
@@ -932,12 +1258,17 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
         ensemble_score = error_info['fallback_score']
         ensemble_confidence = 0.3  # Low confidence for fallback
         model_scores = {}
-        stage_times['ensemble_evaluation_ms'] = (time.time() - stage_start) * 1000
     
-    logger.debug(f"Ensemble evaluation: {stage_times['ensemble_evaluation_ms']:.2f}ms")
+    stage_ns = time.perf_counter_ns() - stage_start
+    stage_times['ensemble_evaluation_ms'] = stage_ns / 1e6
+    logger.debug("Ensemble evaluation: %.2fms", stage_times['ensemble_evaluation_ms'])
+    
+    # Check for timeout (soft check since we can't use signal on Windows)
+    if stage_times['ensemble_evaluation_ms'] > 5000:
+        logger.warning(f"Ensemble evaluation exceeded 5s timeout: {stage_times['ensemble_evaluation_ms']:.2f}ms")
     
     # Record ensemble evaluation performance
-    performance_monitor.record_evaluation_time(stage_times['ensemble_evaluation_ms'], 'ensemble_evaluation')
+    performance_monitor.record_evaluation_time_ns(stage_ns, 'ensemble_evaluation')
     
     # Log model scores
     try:
@@ -945,7 +1276,7 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
             model_scores=model_scores,
             weighted_score=ensemble_score,
             confidence=ensemble_confidence,
-            variance=ensemble_result.get('variance', 0.0) if 'ensemble_result' in locals() else 0.0,
+            variance=ensemble_variance,
             processing_time_ms=stage_times['ensemble_evaluation_ms']
         )
         structured_logger.log_performance('ensemble_evaluation', stage_times['ensemble_evaluation_ms'])
@@ -953,7 +1284,7 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
         logger.warning(f"Failed to log model scores: {e}")
     
     # Stage 4: Final Scoring
-    stage_start = time.time()
+    stage_start = time.perf_counter_ns()
     scoring_result = scoring_algorithm.calculate_final_score(
         ensemble_score=ensemble_score,
         concept_coverage=concept_coverage,
@@ -965,15 +1296,16 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
     final_score = scoring_result['score']
     final_confidence = scoring_result['confidence']
     
-    stage_times['scoring_ms'] = (time.time() - stage_start) * 1000
-    logger.debug(f"Scoring: {stage_times['scoring_ms']:.2f}ms")
+    stage_ns = time.perf_counter_ns() - stage_start
+    stage_times['scoring_ms'] = stage_ns / 1e6
+    logger.debug("Scoring: %.2fms", stage_times['scoring_ms'])
     
     # Record scoring performance
-    performance_monitor.record_evaluation_time(stage_times['scoring_ms'], 'scoring')
+    performance_monitor.record_evaluation_time_ns(stage_ns, 'scoring')
     structured_logger.log_performance('scoring', stage_times['scoring_ms'])
     
     # Calculate total processing time
-    total_time_ms = (time.time() - start_time) * 1000
+    total_time_ms = (time.perf_counter_ns() - start_time) / 1e6
     
     # Determine if needs review (confidence < 0.7)
     needs_review = final_confidence < 0.7
@@ -993,8 +1325,8 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
         # Log for manual review
         log_low_confidence_evaluation(model_answer, student_answer, final_score, final_confidence)
     
-    logger.info(f"✅ Enhanced evaluation complete: score={final_score:.2f}/6, "
-               f"confidence={final_confidence:.4f}, time={total_time_ms:.2f}ms")
+    logger.info("✅ Enhanced evaluation complete: score=%.2f/6, confidence=%.4f, time=%.2fms",
+                final_score, final_confidence, total_time_ms)
     structured_logger.log_performance('total_evaluation', total_time_ms)
     
     # Build response
@@ -1023,20 +1355,24 @@ def enhanced_evaluate(model_answer: str, student_answer: str, domain: str, detai
             'scoring_breakdown': scoring_result['breakdown']
         }
     
-    # Log complete evaluation
-    structured_logger.log_evaluation(
-        model_answer=model_answer,
-        student_answer=student_answer,
-        result=response,
-        domain=domain,
-        detailed=detailed,
-        processing_time_ms=total_time_ms,
-        metadata={
-            'stage_times': stage_times,
-            'preprocessing_corrections': len(student_preprocessed['corrections']),
-            'concept_coverage': concept_coverage
-        }
-    )
+    # Log complete evaluation (the metadata dict is only built when the record will be emitted)
+    if structured_logger.isEnabledFor(logging.INFO):
+        model_key, student_key = answer_keys or (text_key(model_answer), text_key(student_answer))
+        structured_logger.log_evaluation(
+            model_answer=model_answer,
+            student_answer=student_answer,
+            model_answer_id=model_key.hex(),
+            student_answer_id=student_key.hex(),
+            result=response,
+            domain=domain,
+            detailed=detailed,
+            processing_time_ms=total_time_ms,
+            metadata={
+                'stage_times': stage_times,
+                'preprocessing_corrections': len(student_preprocessed['corrections']),
+                'concept_coverage': concept_coverage
+            }
+        )
     
     return response
 
@@ -1066,12 +1402,12 @@ def basic_evaluate(model_answer: str, student_answer: str) -> dict:
         }
     
     # Generate embeddings
-    logger.info(f"Basic evaluation: length={len(student_answer)} chars")
-    embedding1 = model.encode(model_answer, convert_to_tensor=True)
-    embedding2 = model.encode(student_answer, convert_to_tensor=True)
+    logger.debug("Basic evaluation: length=%d chars", len(student_answer))
+    embedding1, embedding2 = encode_pair(model_answer, student_answer)
     
-    # Calculate cosine similarity
-    similarity = util.cos_sim(embedding1, embedding2).item()
+    # Embeddings are L2-normalized by encode(), so cosine similarity is a single dot product
+    with torch.inference_mode():
+        similarity = torch.dot(embedding1.flatten(), embedding2.flatten()).item()
     
     # Convert to score out of 6
     score = round(similarity * 6, 2)
@@ -1080,7 +1416,7 @@ def basic_evaluate(model_answer: str, student_answer: str) -> dict:
     score = max(0.0, min(6.0, score))
     similarity = max(0.0, min(1.0, similarity))
     
-    logger.info(f"✅ Basic evaluation: similarity={similarity:.4f}, score={score}/6")
+    logger.info("✅ Basic evaluation: similarity=%.4f, score=%s/6", similarity, score)
     
     return {
         'similarity': round(similarity, 4),
@@ -1091,6 +1427,49 @@ def basic_evaluate(model_answer: str, student_answer: str) -> dict:
     }
 
 
+# Low-confidence review log: one buffered handle for the process, flushed periodically and at exit
+LOW_CONFIDENCE_LOG = 'logs/evaluations.jsonl'
+LOW_CONFIDENCE_FLUSH_SEC = 0.5
+low_confidence_file = None
+low_confidence_lock = threading.Lock()
+
+
+def flush_low_confidence_log():
+    """Flush buffered low-confidence entries to disk"""
+    with low_confidence_lock:
+        if low_confidence_file is not None:
+            low_confidence_file.flush()
+
+
+def run_low_confidence_flusher():
+    """Flush the low-confidence log every LOW_CONFIDENCE_FLUSH_SEC seconds"""
+    while True:
+        time.sleep(LOW_CONFIDENCE_FLUSH_SEC)
+        try:
+            flush_low_confidence_log()
+        except Exception as e:
+            logger.error(f"Failed to flush low-confidence log: {e}")
+
+
+def open_low_confidence_log():
+    """Open the low-confidence log on first use (call with low_confidence_lock held)"""
+    global low_confidence_file
+    
+    os.makedirs('logs', exist_ok=True)
+    low_confidence_file = open(LOW_CONFIDENCE_LOG, 'ab', buffering=64 * 1024)
+    atexit.register(flush_low_confidence_log)
+    start_low_confidence_flusher()
+    if hasattr(os, 'register_at_fork'):
+        # Children must not inherit (and re-write) buffered entries, and need their own flusher
+        os.register_at_fork(before=flush_low_confidence_log, after_in_child=start_low_confidence_flusher)
+    return low_confidence_file
+
+
+def start_low_confidence_flusher():
+    """Start the background flusher thread for the low-confidence log"""
+    threading.Thread(target=run_low_confidence_flusher, name='low-confidence-flusher', daemon=True).start()
+
+
 def log_low_confidence_evaluation(model_answer: str, student_answer: str, score: float, confidence: float):
     """
     Log low-confidence evaluations for manual review
@@ -1111,18 +1490,27 @@ def log_low_confidence_evaluation(model_answer: str, student_answer: str, score:
             'needs_review': True
         }
         
-        # Ensure logs directory exists
-        os.makedirs('logs', exist_ok=True)
+        if orjson is not None:
+            line = orjson.dumps(log_entry) + b'\n'
+        else:
+            line = json.dumps(log_entry).encode('utf-8') + b'\n'
         
-        # Append to evaluations log
-        with open('logs/evaluations.jsonl', 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        # Append to evaluations log (buffered; the flusher thread writes it out)
+        with low_confidence_lock:
+            f = low_confidence_file or open_low_confidence_log()
+            f.write(line)
         
         logger.info(f"Logged low-confidence evaluation to logs/evaluations.jsonl")
         
     except Exception as e:
         logger.error(f"Failed to log low-confidence evaluation: {e}")
 
+@lru_cache(maxsize=1024)
+def content_words(text):
+    """Lowercased words longer than 3 characters, memoized for repeated (model) answers"""
+    return frozenset(w for w in text.lower().split() if len(w) > 3)
+
+
 def simple_similarity(text1, text2):
     """
     Fallback similarity calculation using word overlap
@@ -1130,58 +1518,67 @@ def simple_similarity(text1, text2):
     if not text1 or not text2:
         return 0.0
     
-    # Convert to lowercase and split into words
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
-    
-    # Filter out very short words
-    words1 = {w for w in words1 if len(w) > 3}
-    words2 = {w for w in words2 if len(w) > 3}
+    words1 = content_words(text1)
+    words2 = content_words(text2)
     
     if not words1 or not words2:
         return 0.0
     
-    # Calculate Jaccard similarity
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    # Calculate Jaccard similarity; the union size follows from the intersection
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
+
+
+def warm_up_models():
+    """Run throwaway evaluations so first-call allocation and kernel setup happen before serving"""
+    short_text = 'warm up answer'
+    long_text = ' '.join(['token'] * 512)
+    
+    try:
+        for _ in range(2):
+            if model is not None:
+                encode([short_text, long_text])
+            if ensemble_evaluator:
+                ensemble_evaluator.ensemble_evaluate(long_text, short_text)
+        logger.info("✅ Models warmed up")
+    except Exception as e:
+        logger.warning(f"⚠️ Model warm-up failed: {e}")
+
+
+# Warm up at import so both app.run and preloaded Gunicorn workers start hot
+warm_up_models()
+
+def run_startup_validation():
+    """Run the startup environment checks if enhanced mode is available (before serving, and before any worker fork)"""
+    if not enhanced_mode_available:
+        return
+    
+    try:
+        from preprocessing.startup_validation import StartupValidator
+        
+        logger.info("Running startup validation...")
+        
+        validation_result = StartupValidator().run_startup_validation()
+        
+        if validation_result['can_start']:
+            logger.info("✅ Startup validation passed:\n%s", validation_result['summary'])
+        else:
+            logger.warning("⚠️ Startup validation failed: %s", "; ".join(validation_result['errors']))
+            logger.warning("%s", validation_result['summary'])
     
-    similarity = len(intersection) / len(union) if union else 0.0
-    return similarity
+    except Exception as e:
+        logger.warning(f"⚠️ Startup validation error: {e}")
+        logger.info("Continuing service startup...")
+
 
 if __name__ == '__main__':
     logger.info("🚀 Starting SBERT evaluation service on port 5001...")
     
-    # Run startup validation if enhanced mode is available
-    if enhanced_mode_available:
-        try:
-            from preprocessing.startup_validation import StartupValidator
-            
-            logger.info("Running startup validation...")
-            
-            # Create evaluator function for validation
-            def validation_evaluator(model_answer, student_answer, domain):
-                """Wrapper function for startup validation"""
-                result = enhanced_evaluate(model_answer, student_answer, domain, False, time.time())
-                return result
-            
-            # Run validation
-            validator = StartupValidator()
-            validation_result = validator.run_startup_validation(validation_evaluator)
-            
-            if validation_result['status'] == 'passed':
-                logger.info(f"✅ Startup validation passed: {validation_result['overall_accuracy']:.1f}% accuracy")
-            else:
-                logger.warning(f"⚠️ Startup validation failed: {validation_result.get('overall_accuracy', 0):.1f}% accuracy")
-                if validation_result.get('needs_calibration'):
-                    logger.warning("⚠️ Model calibration recommended")
-        
-        except Exception as e:
-            logger.warning(f"⚠️ Startup validation error: {e}")
-            logger.info("Continuing service startup...")
+    run_startup_validation()
     
     # Log initial performance metrics
     performance_monitor.log_performance_metrics()
     
-    # Start the Flask app
+    # Start the Flask app (development server; use gunicorn.conf.py in production)
     logger.info("✅ Service ready - listening on http://0.0.0.0:5001")
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
\ No newline at end of file